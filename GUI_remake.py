@@ -1,16 +1,24 @@
-import gi, os, csv, time
+import gi, os, threading
 import numpy as np
-import openpyxl, shutil, datetime, re
 import subprocess
-from threading import Thread  # Correct import for threading
 # os.environ["LIBGL_ALWAYS_SOFTWARE"] = "1"
 os.environ["GDK_RENDERING"] = "gl"  # or "gl"
 gi.require_version("Gtk", "4.0")
 from gi.repository import Gtk, Gio, Gdk  # Import Gdk for applying the CSS
-from PIL import Image, ImageDraw
+from PIL import Image
 from gi.repository import GdkPixbuf, GLib
-from typing import List
 import client
+from coords import CoordinateTail
+from map_render import MapProjection
+from file_watch import FileWatcher
+from render_scheduler import RenderScheduler
+from render_worker import RenderWorker
+from replay import ReplayEngine, MultiTrackReplay, SPEEDS as REPLAY_SPEEDS
+from replay_library import ReplayLibrary
+from recorder import TelemetryRecorder
+from xlsx_export import ExcelExport
+from tiles import TiledMap, TiledMapRenderer
+from instrumentation import metrics
 
 # Load drone images as PIL images (ensure they are small e.g. 20x20 px)
 disco_icon = Image.open("/home/dfec/Desktop/GUI CAPSTONE/DiscoveryDrone_Transparent.png").convert("RGBA")
@@ -19,79 +27,11 @@ disco_icon = disco_icon.resize((50, 50), Image.ANTIALIAS)  # Resize to 20x20 pix
 rogue_icon = Image.open("/home/dfec/Desktop/GUI CAPSTONE/RogueDrone_Transparent.png").convert("RGBA")
 rogue_icon = rogue_icon.resize((50, 50), Image.ANTIALIAS)  # Resize to 20x20 pixels
 
-def clean_coordinate(value):
-    """
-    Cleans a coordinate string by ensuring correct decimal placement and preventing unnecessary float rounding.
-    """
-    if isinstance(value, (int, float)):
-        return value  # If it's already a valid number, return as-is
-
-    if isinstance(value, str):
-        value = value.strip().replace(" ", "")
-
-        # Ensure it follows the correct format (detect negative and decimal)
-        match = re.search(r"-?\d+\.\d+", value)
-        if match:
-            return float(match.group())  # Convert to float while preserving precision
-
-    return None
-
-def read_coordinates(file_path: str) -> List[float | int]:
-    """
-    Reads latitude and longitude coordinates from a CSV or Excel (.xlsx) file.
-    Supports formats with BREAK lines and standard telemetry headers.
-    """
-    coordinates = []
-
-    try:
-        if file_path.lower().endswith(".xlsx"):
-            wb = openpyxl.load_workbook(file_path, data_only=True)
-            sheet = wb.active
-
-            for row in sheet.iter_rows(values_only=True):
-                if len(row) < 3 or row[1] is None or row[2] is None:
-                    continue
-                latitude = clean_coordinate(row[1])
-                longitude = clean_coordinate(row[2])
-                if latitude is not None and longitude is not None:
-                    if -90 <= latitude <= 90 and -180 <= longitude <= 180:
-                        coordinates.append((latitude, longitude))
-
-        elif file_path.lower().endswith(".csv"):
-            with open(file_path, mode='r', newline='', encoding='utf-8') as file:
-                reader = csv.reader(file)
-                headers = []
-                for row in reader:
-                    if not row or row[0].startswith("BREAK"):
-                        continue
-
-                    # Update headers if it's a header row
-                    if row[0].strip() == "Time" and "Latitude" in row and "Longitude" in row:
-                        headers = row
-                        continue
-
-                    if len(headers) >= 3:
-                        try:
-                            lat_idx = headers.index("Latitude")
-                            lon_idx = headers.index("Longitude")
-
-                            lat_value = row[lat_idx]
-                            lon_value = row[lon_idx]
-
-                            latitude = clean_coordinate(lat_value)
-                            longitude = clean_coordinate(lon_value)
-
-                            if latitude is not None and longitude is not None:
-                                if -90 <= latitude <= 90 and -180 <= longitude <= 180:
-                                    coordinates.append((latitude, longitude))
-                        except Exception as e:
-                            print(f"Skipping row: {row} due to error: {e}")
-    except Exception as e:
-        print(f"Error reading file {file_path}: {e}")
-
-    return coordinates
-
-
+# Pipeline instrumentation (stage timings, FPS, glass-to-glass latency), costs nothing while off
+METRICS_ENABLED = False
+METRICS_HUD = True  # Show FPS and latency over the map while metrics are enabled
+METRICS_EXPORT = "/tmp/gui_metrics.json"  # JSON snapshot file, or "udp://127.0.0.1:9999", None to disable
+METRICS_EXPORT_INTERVAL = 5  # seconds
 
 
 class MyWindow(Gtk.Window):
@@ -148,9 +88,11 @@ class MyWindow(Gtk.Window):
         self.rogue_coordinates = []
         self.discovery_coordinates = []
 
-        # Initialize counters for save operations
-        self.rogue_save_counter = 1
-        self.discovery_save_counter = 1
+        # Every received telemetry sample is recorded to session files, saving rotates them
+        self.recorder = TelemetryRecorder("/home/dfec/Desktop/GUI CAPSTONE")
+        client.addListener(self.recorder.submit)
+        client.subscribe(self.on_telemetry)  # Pushed by the async bridge as samples arrive
+        self.connect("close-request", self.on_close_request)
 
         # Keep track of already plotted points
         self.plotted_points = set()  # Use a set to store (latitude, longitude) tuples for quick lookup
@@ -223,15 +165,73 @@ class MyWindow(Gtk.Window):
         main_box.append(self.content_area)
 
         # Inside MyWindow.__init__ before self.refresh_image(...)
-        self.replay_map_image = None  # Holds persistent replay map drawing
+        self.replay_engine = None  # Active ReplayEngine, if any
+        self.replay_request = None  # Latest replay being loaded in the background
+        self.replay_speed = 1
         self.map_image_widget = Gtk.Picture()
         self.map_image_widget.set_hexpand(True)
         self.map_image_widget.set_vexpand(True)
-        self.content_area.append(self.map_image_widget)
+
+        # Metrics HUD floats over the top-left corner of the map without taking its input
+        self.metrics_hud = Gtk.Label()
+        self.metrics_hud.add_css_class("metrics-hud")
+        self.metrics_hud.set_halign(Gtk.Align.START)
+        self.metrics_hud.set_valign(Gtk.Align.START)
+        self.metrics_hud.set_can_target(False)
+        self.metrics_hud.set_visible(metrics.enabled and METRICS_HUD)
+        map_overlay = Gtk.Overlay()
+        map_overlay.set_child(self.map_image_widget)
+        map_overlay.add_overlay(self.metrics_hud)
+        self.content_area.append(map_overlay)
 
         # Load initial static image map
         self.refresh_image("/home/dfec/Desktop/GUI CAPSTONE/GUI CAPSTONE/Test2Map.png")
 
+        # Lat/lon -> pixel projection shared by live and replay rendering
+        self.map_projection = MapProjection.for_image("/home/dfec/Desktop/GUI CAPSTONE/Test2Map.png")
+
+        # Live map view: tiles of the base map, zoomed with the scroll wheel and panned by dragging
+        self.tiled_map = TiledMap("/home/dfec/Desktop/GUI CAPSTONE/Test2Map.png")
+        self.map_tracks = None  # Last (rogue, discovery) coordinates drawn, redrawn when the view changes
+        self.pointer = (0.0, 0.0)
+
+        scroll = Gtk.EventControllerScroll.new(Gtk.EventControllerScrollFlags.VERTICAL)
+        scroll.connect("scroll", self.on_map_scroll)
+        self.map_image_widget.add_controller(scroll)
+
+        motion = Gtk.EventControllerMotion()
+        motion.connect("motion", lambda controller, x, y: setattr(self, "pointer", (x, y)))
+        self.map_image_widget.add_controller(motion)
+
+        drag = Gtk.GestureDrag()
+        drag.connect("drag-begin", self.on_map_drag_begin)
+        drag.connect("drag-update", self.on_map_drag_update)
+        self.map_image_widget.add_controller(drag)
+
+        double_click = Gtk.GestureClick()
+        double_click.connect("pressed", self.on_map_pressed)
+        self.map_image_widget.add_controller(double_click)
+
+        # Saved sorties with cached metadata for the replay picker
+        self.replay_library = ReplayLibrary(
+            "/home/dfec/Desktop/GUI CAPSTONE",
+            "/home/dfec/Desktop/GUI CAPSTONE/Test2Map.png",
+            self.map_projection,
+        )
+
+        # Frames are rasterized off the main thread, which only swaps in the finished texture
+        self.render_worker = RenderWorker(self.present_frame)
+
+        # Map redraws are paced to the widget's frame clock, at most one frame pending
+        self.map_fps = 30
+        self.render_scheduler = RenderScheduler(self.map_image_widget, self.update_map, self.map_fps)
+
+        if metrics.enabled:
+            if METRICS_HUD:
+                GLib.timeout_add(500, self.update_metrics_hud)
+            if METRICS_EXPORT:
+                GLib.timeout_add_seconds(METRICS_EXPORT_INTERVAL, self.export_metrics)
+
         # ----------------------- Right Side Panel ----------------------------
         right_panel = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=0)
         right_panel.set_size_request(300, -1)  # Set a fixed width for the side panel
@@ -256,6 +256,28 @@ class MyWindow(Gtk.Window):
         replay_button.connect("clicked", self.on_replay_button_clicked)  # Connect replay function
         right_panel.append(replay_button)
 
+        # Replay controls: pause/resume, playback speed and a seek bar over the track's time span
+        replay_controls = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=5)
+        replay_controls.set_margin_start(10)
+        replay_controls.set_margin_end(10)
+
+        self.replay_pause_button = Gtk.Button(label="Pause Replay")
+        self.replay_pause_button.connect("clicked", self.on_replay_pause_clicked)
+        replay_controls.append(self.replay_pause_button)
+
+        replay_speed_dropdown = Gtk.ComboBoxText()
+        for speed in REPLAY_SPEEDS:
+            replay_speed_dropdown.append_text(f"{speed}x")
+        replay_speed_dropdown.set_active(0)
+        replay_speed_dropdown.connect("changed", self.on_replay_speed_changed)
+        replay_controls.append(replay_speed_dropdown)
+
+        self.replay_scale = Gtk.Scale.new_with_range(Gtk.Orientation.HORIZONTAL, 0, 1, 0.1)
+        self.replay_scale.set_draw_value(False)
+        self.replay_scale.connect("change-value", self.on_replay_seek)  # User moves only
+        replay_controls.append(self.replay_scale)
+        right_panel.append(replay_controls)
+
         # Save RogueCoord Btn 
         save_rogue_button = Gtk.Button(label="Save Rogue Coordinates")
         save_rogue_button.connect("clicked", self.on_save_rogue_coords_clicked)
@@ -364,6 +386,14 @@ class MyWindow(Gtk.Window):
             .status-error {
                 background-color: #F44336; /* Red */
             }
+            .metrics-hud {
+                margin: 8px;
+                padding: 6px;
+                border-radius: 5px;
+                background-color: rgba(0, 0, 0, 0.6);
+                color: white;
+                font-family: monospace;
+            }
             """
             css_provider.load_from_data(css)
             display = Gdk.Display.get_default()
@@ -373,29 +403,33 @@ class MyWindow(Gtk.Window):
 
     def save_coordinates_to_excel(self, coordinates, file_name):
         """
-        Saves coordinates to an Excel file in the same format as the original file.
-        :param coordinates: List of (latitude, longitude) tuples.
+        Exports coordinates to an Excel file with numeric Time, Latitude and Longitude columns.
+        The workbook is streamed to disk on a background thread, progress is printed from the main loop.
+        :param coordinates: List of (latitude, longitude) tuples or a TrackSnapshot.
         :param file_name: Path to the output Excel file.
         """
-        print(f"Saving coordinates: {coordinates} to {file_name}")
+        print(f"Saving {len(coordinates)} coordinates to {file_name}")
 
-        # Create a new Excel workbook
-        workbook = openpyxl.Workbook()
-        sheet = workbook.active
-        sheet.title = "Coordinates"
+        if hasattr(coordinates, "times"):
+            times, latitudes, longitudes = coordinates.times, coordinates.latitudes, coordinates.longitudes
+        else:
+            # Untimed points are spaced 0.2 s apart, like replay does
+            points = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+            times, latitudes, longitudes = np.arange(len(points)) * 0.2, points[:, 0], points[:, 1]
 
-        # Write the header in a single cell
-        sheet.append(["Latitude,Longitude"])
+        def progress(written, total):
+            GLib.idle_add(print, f"Exported {written}/{total} coordinates to {file_name}")
 
-        # Write coordinates to the Excel sheet
-        for coord in coordinates:
-            # Combine latitude and longitude into one string with a comma, replacing '.' with ','
-            combined = f"{coord[0]:.8f},{coord[1]:.8f}".replace('.', ',')
-            sheet.append([combined])  # Write the combined string into one cell
+        def done(result):
+            if result:
+                GLib.idle_add(print, f"Saved coordinates to {file_name}")
 
-        # Save the workbook
-        workbook.save(file_name)
-        print(f"Saved coordinates to {file_name}")
+        ExcelExport(
+            file_name,
+            [("Time", times), ("Latitude", latitudes), ("Longitude", longitudes)],
+            progress,
+            done,
+        ).start()
 
     def on_clear_map_clicked(self, button):
         """
@@ -422,44 +456,27 @@ class MyWindow(Gtk.Window):
 
         # Force a data update immediately
         (self.discovery_coordinates, self.rogue_coordinates) = client.getVals()
-        self.update_map(self.rogue_coordinates, self.discovery_coordinates)
+        self.render_scheduler.submit(self.rogue_coordinates, self.discovery_coordinates)
 
     def on_save_rogue_coords_clicked(self, button):
         """
-        Copies the original RogueCoords.csv file and saves it with a unique timestamp.
+        Finishes the current rogue session file; recording continues in a new one.
+        The recorder closes the file in the background, so this never waits on the disk.
         """
-        try:
-            base_path = "/home/dfec/Desktop/GUI CAPSTONE"
-            original_file = os.path.join(base_path, "RogueCoords.csv")  # Ensure it's a CSV file
-
-            # Create a unique filename using a timestamp
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            new_file = os.path.join(base_path, f"RogueCoords_Copy_{timestamp}.csv")
-
-            # Copy the file
-            shutil.copy(original_file, new_file)
-
-            print(f"Saved a copy of RogueCoords.csv as: {new_file}")
-
-        except Exception as e:
-            print(f"Error copying RogueCoords.csv: {e}")
+        self.recorder.rotate("rogue")
+        print("Saving rogue telemetry session")
 
     def on_save_discovery_coords_clicked(self, button):
         """
-        Copies the original DiscoveryCoords.xlsx file and saves it with a unique name.
+        Finishes the current discovery session file; recording continues in a new one.
         """
-        try:
-            base_path = "/home/dfec/Desktop/GUI CAPSTONE"
-            original_file = os.path.join(base_path, "DiscoveryCoords.csv")  # Ensure correct file format
-            new_file = os.path.join(base_path, f"discovery_coords_copy_{self.discovery_save_counter}.csv")
-
-            shutil.copy(original_file, new_file)  # Copy to retain original structure
-
-            print(f"Saved discovery coordinates as a copy: {new_file}")
+        self.recorder.rotate("discovery")
+        print("Saving discovery telemetry session")
 
-            self.discovery_save_counter += 1  # Increment counter
-        except Exception as e:
-            print(f"Error saving discovery coordinates: {e}")
+    def on_close_request(self, window):
+        # Write out whatever the recorder still has buffered
+        self.recorder.close()
+        return False
 
     def on_start_flight_button_clicked(self, button):
         script_path = "/home/dfec/camera_start.sh"
@@ -475,6 +492,7 @@ class MyWindow(Gtk.Window):
     def on_replay_button_clicked(self, button):
         """
         Displays a dropdown containing all replay save files (both Rogue & Discovery).
+        The list comes from the replay library index and is updated once a background rescan finishes.
         The user selects a file, and the replay starts automatically.
         """
         # Create a modal dialog
@@ -485,20 +503,55 @@ class MyWindow(Gtk.Window):
         )
         dialog.set_default_size(300, 150)
 
+        def describe(entry):
+            if not entry["points"]:
+                return f"{entry['name']} (empty)"
+            return f"{entry['name']} ({entry['points']} pts, {entry['end'] - entry['start']:.0f} s)"
+
         # Create a dropdown menu
         file_dropdown = Gtk.ComboBoxText()
 
-        # Combine all available replay files (Rogue + Discovery)
-        all_replay_files = [
-             "RogueCoords_Downsampled_Every5.csv"
-        ]
+        # Optional second track replayed on the same clock
+        discovery_dropdown = Gtk.ComboBoxText()
 
-        # Populate the dropdown
-        for file in all_replay_files:
-            file_dropdown.append_text(file)
+        def populate(entries):
+            """
+            Fills both dropdowns, newest first, keeping the current selections where they still exist.
+            """
+            selected, discovery = file_dropdown.get_active_id(), discovery_dropdown.get_active_id()
+            file_dropdown.remove_all()
+            for entry in entries:
+                file_dropdown.append(entry["name"], describe(entry))
+            discovery_dropdown.remove_all()
+            discovery_dropdown.append("", "No discovery track")
+            for entry in self.replay_library.list("discovery"):
+                discovery_dropdown.append(entry["name"], describe(entry))
+            # Select the first file by default
+            if selected is None or not file_dropdown.set_active_id(selected):
+                file_dropdown.set_active(0)
+            if discovery is None or not discovery_dropdown.set_active_id(discovery):
+                discovery_dropdown.set_active(0)
+            return False  # One-shot idle
+
+        # Show the indexed sorties straight away, then rescan the directory on a background thread
+        # and fill in new or modified files. Sessions the recorder is still writing are left out.
+        populate(self.replay_library.list())
+        self.replay_library.refresh_async(lambda entries: GLib.idle_add(populate, entries),
+                                          skip=self.recorder.active_paths())
+
+        # Thumbnail of the selected track
+        thumbnail = Gtk.Picture()
+        thumbnail.set_size_request(160, 150)
+
+        def on_file_changed(dropdown):
+            entry = self.replay_library.entries.get(dropdown.get_active_id())
+            if entry and entry["thumbnail"]:
+                thumbnail.set_filename(entry["thumbnail"])
+            else:
+                thumbnail.set_paintable(None)
 
-        # Select the first file by default
-        file_dropdown.set_active(0)
+        file_dropdown.connect("changed", on_file_changed)
+        on_file_changed(file_dropdown)
 
         # Layout for the dialog
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=10)
@@ -507,6 +560,8 @@ class MyWindow(Gtk.Window):
         box.set_margin_start(20)
         box.set_margin_end(20)
         box.append(file_dropdown)
+        box.append(thumbnail)
+        box.append(discovery_dropdown)
 
         # Add buttons to the dialog
         dialog_content_area = dialog.get_content_area()
@@ -521,8 +576,13 @@ class MyWindow(Gtk.Window):
 
         def on_response(dialog, response):
             if response == Gtk.ResponseType.OK:
-                selected_file = file_dropdown.get_active_text()
-                if selected_file:
+                selected = file_dropdown.get_active_id()
+                selected_file = os.path.join(self.replay_library.directory, selected) if selected else None
+                if selected_file and discovery_dropdown.get_active_id():
+                    discovery_file = os.path.join(self.replay_library.directory, discovery_dropdown.get_active_id())
+                    print(f"Replay selected for files: {selected_file}, {discovery_file}")
+                    self.replay_tracks([selected_file, discovery_file])  # Start synchronized replay
+                elif selected_file:
                     print(f"Replay selected for file: {selected_file}")
                     self.replay_points(selected_file, "replay_drone", (1,0,0))  # Start replay
                 else:
@@ -560,135 +620,140 @@ class MyWindow(Gtk.Window):
         self.clear_map()
         self.auto_reload = False  # Disable auto-reloading if needed
 
-    def start_csv_monitoring(self):
+    def start_csv_monitoring(self, min_frame_interval=0.1):
         """
-        Starts a background thread to monitor the CSV files for updates.
+        Watches the CSV files for updates and redraws the map when new rows arrive.
+        :param min_frame_interval: Minimum seconds between redraws, bursts of writes are coalesced.
         """
-        def monitor_csv_file():
+        # Incremental readers only parse the rows appended since the previous change
+        rogue_tail = CoordinateTail(self.rogue_csv_file_path)
+        discovery_tail = CoordinateTail(self.discovery_csv_file_path)
+        parse_requested = threading.Event()  # Set by the watcher, changes during a parse ride along with the next one
+
+        def parse_files():
+            # Parses on its own thread, only the resulting coordinate lists go back to the main loop
             while True:
+                parse_requested.wait()
+                parse_requested.clear()
+                seen = (len(rogue_tail.coordinates), len(discovery_tail.coordinates))
                 try:
-                    if not self.auto_reload:  # Ensure auto-reload is OFF before processing updates
-                        print("Auto-reload disabled. Waiting...")
-                        time.sleep(2)  # Sleep longer when disabled to avoid spamming logs
-                        continue  # Skip the rest of the loop
-
-                    # Save the data to class variables for later use
-                    (self.discovery_coordinates, self.rogue_coordinates) = client.getVals()
-
-                    # Read the rogue and discovery coordinates
-                    rogue_coordinates = read_coordinates(self.rogue_csv_file_path)
-                    discovery_coordinates = read_coordinates(self.discovery_csv_file_path)
+                    with metrics.stage("parse"):
+                        rogue_coordinates = rogue_tail.read()
+                        discovery_coordinates = discovery_tail.read()
+                except Exception as e:
+                    print(f"Error parsing CSV files: {e}")
+                    continue
 
-                    # Safely update the map on the main thread
-                    GLib.idle_add(self.update_map, rogue_coordinates, discovery_coordinates)
+                # Only redraw when the change actually produced new points
+                if (len(rogue_coordinates), len(discovery_coordinates)) != seen:
+                    GLib.idle_add(on_csv_parsed, rogue_coordinates, discovery_coordinates)
 
-                    
-                    # self.rogue_coordinates = rogue_coordinates
-                    # self.discovery_coordinates = discovery_coordinates
+        def on_csv_parsed(rogue_coordinates, discovery_coordinates):
+            if self.auto_reload:
+                self.render_scheduler.submit(rogue_coordinates, discovery_coordinates)
+            return False  # One-shot idle
 
-                except Exception as e:
-                    print(f"Error in monitor_csv_file: {e}")
+        def on_csv_changed(changed_paths):
+            if not self.auto_reload:  # Leave new rows in the files until auto-reload is back on
+                return
 
-                time.sleep(0.5)  # Sleep for 500ms before checking again
+            # Save the data to class variables for later use
+            (self.discovery_coordinates, self.rogue_coordinates) = client.getVals()
+            parse_requested.set()
+
+        def drain_telemetry():
+            # Keeps the client ring buffer drained (and recorded) while the files are quiet or auto-reload is off
+            discovery_coordinates, rogue_coordinates = client.getVals()
+            if self.auto_reload:
+                (self.discovery_coordinates, self.rogue_coordinates) = (discovery_coordinates, rogue_coordinates)
+            return True
+
+        threading.Thread(target=parse_files, daemon=True).start()
+        # Runs on the GLib main loop, the parsing is handed to the thread above
+        self.csv_watcher = FileWatcher(
+            [self.rogue_csv_file_path, self.discovery_csv_file_path],
+            on_csv_changed,
+            min_interval=min_frame_interval,
+        )
+        if client.bridge is None:  # The async bridge pushes samples to on_telemetry instead
+            GLib.timeout_add_seconds(1, drain_telemetry)
 
+        # Pick up whatever is already in the files, also parsed off the main loop
+        on_csv_changed([])
 
-        # Passes function without self issue
-        monitor_thread = Thread(target=monitor_csv_file)
-        monitor_thread.daemon = True  # Ensures the thread stops when the application closes
-        monitor_thread.start()
+    def on_telemetry(self, discovery_coordinates, rogue_coordinates):
+        """
+        Called on the main loop by the async bridge with fresh track snapshots.
+        """
+        if self.auto_reload:
+            (self.discovery_coordinates, self.rogue_coordinates) = (discovery_coordinates, rogue_coordinates)
 
     def update_map(self, rogue_coordinates, discovery_coordinates):
         """
         Updates the map with rogue and discovery coordinates.
+        Drawing happens on the render worker, the result is shown by present_frame().
         :param rogue_coordinates: List of tuples (latitude, longitude) for rogue drones.
         :param discovery_coordinates: List of tuples (latitude, longitude) for discovery drones.
         """
-        try:
-            # win.update_status_label(client.isConnected())
+        self.map_tracks = (rogue_coordinates, discovery_coordinates)
+
+        # Frames are rendered at the widget's size so the view maps 1:1 to the screen
+        self.tiled_map.resize(self.map_image_widget.get_width(), self.map_image_widget.get_height())
 
-            # Clear the map and start with the base image
-            if not hasattr(self, "base_map_pixbuf"):
-                self.base_map_pixbuf = GdkPixbuf.Pixbuf.new_from_file(
-                   "/home/dfec/Desktop/GUI CAPSTONE/Test2Map.png"
+        def rasterize():
+            # The renderer keeps the composed view and the trail layer between frames
+            if not hasattr(self, "map_renderer"):
+                self.map_renderer = TiledMapRenderer(
+                   self.tiled_map,
+                   {"rogue": rogue_icon, "discovery": disco_icon},
                 )
-            
-            # Convert Pixbuf to a PIL Image
-            width, height = self.base_map_pixbuf.get_width(), self.base_map_pixbuf.get_height()
-            rowstride, n_channels = self.base_map_pixbuf.get_rowstride(), self.base_map_pixbuf.get_n_channels()
-            pixels = self.base_map_pixbuf.get_pixels()
-
-            array = np.frombuffer(pixels, dtype=np.uint8).reshape((height, rowstride))
-
-            if n_channels == 1:
-                # Convert grayscale to RGB
-                image_data = np.stack((array[:, :width],) * 3, axis=-1)
-            elif n_channels == 3:
-                image_data = array[:, :width * 3].reshape((height, width, 3))
-            elif n_channels == 4:
-                image_data = array[:, :width * 4].reshape((height, width, 4))[:, :, :3]
-            else:
-                raise ValueError(f"Unexpected number of channels: {n_channels}")
-
-            pil_image = Image.fromarray(image_data, "RGB")
-            draw = ImageDraw.Draw(pil_image)
-
-            # Define map corners (lat/lon)
-            lat1, lon1 = 39.019045, -104.894301  # Top-left corner
-            lat3, lon3 = 39.017430, -104.894301  # Bottom-left corner
-            lon2 = -104.892113  # Top-right corner
-
-            # Calculate lat/lon per pixel
-            lat_range = lat1 - lat3
-            lon_range = lon2 - lon1
-            lat_per_pixel = lat_range / height
-            lon_per_pixel = lon_range / width
-
-            # Function to plot points
-            def plot_point(coordinate, color):
-                latitude, longitude = coordinate
-                if not (lat3 <= latitude <= lat1) or not (lon1 <= longitude <= lon2):
-                    print(f"Warning: Latitude {latitude} or Longitude {longitude} out of bounds.")
-                    return None
-                pixel_x = int((longitude - lon1) / lon_per_pixel)
-                pixel_y = int((lat1 - latitude) / lat_per_pixel)
-                draw.ellipse((pixel_x - 5, pixel_y - 5, pixel_x + 5, pixel_y + 5), fill=color, outline="black")
-
-            # Plot all but the last rogue coordinate as circles
-            for coord in rogue_coordinates[:-1]:
-                plot_point(coord, "red")
-
-            # Plot last rogue coordinate with the rogue drone image
-            if rogue_coordinates:
-                lat, lon = rogue_coordinates[-1]
-                pixel_x = int((lon - lon1) / lon_per_pixel)
-                pixel_y = int((lat1 - lat) / lat_per_pixel)
-                pil_image.paste(rogue_icon, (pixel_x - rogue_icon.width // 2, pixel_y - rogue_icon.height // 2), mask=rogue_icon)
-
-            # Same for discovery
-            for coord in discovery_coordinates[:-1]:
-                plot_point(coord, "green")
-
-            if discovery_coordinates:
-                lat, lon = discovery_coordinates[-1]
-                pixel_x = int((lon - lon1) / lon_per_pixel)
-                pixel_y = int((lat1 - lat) / lat_per_pixel)
-                pil_image.paste(disco_icon, (pixel_x - disco_icon.width // 2, pixel_y - disco_icon.height // 2), mask=disco_icon)
-
-
-            # Convert back to Pixbuf for GTK
-            updated_array = np.array(pil_image)
-            updated_pixbuf = GdkPixbuf.Pixbuf.new_from_data(
-                updated_array.tobytes(),
-                GdkPixbuf.Colorspace.RGB,
-                False,
-                8,
-                updated_array.shape[1],
-                updated_array.shape[0],
-                updated_array.shape[1] * 3,
-            )
-            texture = Gdk.Texture.new_for_pixbuf(updated_pixbuf)
-
-            # Update the Gtk.Picture widget
+
+            self.map_renderer.render({
+                "rogue": rogue_coordinates,
+                "discovery": discovery_coordinates,
+            })
+            return self.map_renderer.frame_buffer
+
+        # The newest sender timestamp at submit time dates the frame for the latency metrics
+        self.render_worker.submit(rasterize, client.getTimestamp() if metrics.enabled else None)
+
+    def redraw_map(self):
+        # Re-render the live map after a view change, replays draw on their own canvas
+        if self.map_tracks is not None and self.auto_reload:
+            self.render_scheduler.submit(*self.map_tracks)
+
+    def on_map_scroll(self, controller, dx, dy):
+        self.tiled_map.zoom_at(1.25 ** -dy, *self.pointer)
+        self.redraw_map()
+        return True
+
+    def on_map_drag_begin(self, gesture, start_x, start_y):
+        self.drag_offset = (0.0, 0.0)
+
+    def on_map_drag_update(self, gesture, offset_x, offset_y):
+        # Offsets are from the drag start, pan by the change since the last update
+        self.tiled_map.pan(offset_x - self.drag_offset[0], offset_y - self.drag_offset[1])
+        self.drag_offset = (offset_x, offset_y)
+        self.redraw_map()
+
+    def on_map_pressed(self, gesture, n_press, x, y):
+        if n_press == 2:  # Double click shows the whole map again
+            self.tiled_map.fit()
+            self.redraw_map()
+
+    def update_metrics_hud(self):
+        self.metrics_hud.set_text(metrics.hud_text())
+        return True
+
+    def export_metrics(self):
+        metrics.export(METRICS_EXPORT)
+        return True
+
+    def present_frame(self, texture):
+        """
+        Shows a frame finished by the render worker. Runs on the main thread.
+        """
+        try:
             self.map_image_widget.set_paintable(texture)
             self.content_area.queue_draw()
         except Exception as e:
@@ -697,102 +762,130 @@ class MyWindow(Gtk.Window):
     def replay_points(self, file_name, drone_name, color):
         """
         Replays saved flight path from a selected file.
+        Playback follows the file's Time column and is driven by the replay controls.
         """
-        try:
-            print(f"Replay initiated for {drone_name} drone with file: {file_name}")
-            self.auto_reload = False  
-            print("Auto-reload permanently disabled during replay.")
+        print(f"Replay initiated for {drone_name} drone with file: {file_name}")
 
-            # Load coordinates
-            coordinates = read_coordinates(file_name)
-            if not coordinates:
+        def build():
+            # Load and project the whole track up front
+            engine = ReplayEngine.load(file_name, "/home/dfec/Desktop/GUI CAPSTONE/Test2Map.png", self.map_projection)
+            if not len(engine):
                 print(f"No coordinates found in {file_name}")
-                return
+                return None
+            print(f"Loaded {len(engine)} points from {file_name} ({engine.duration:.1f} s)")
+            return engine
 
-            print(f"Loaded {len(coordinates)} points from {file_name}")
-
-            # Load a fresh copy of the base map as the replay canvas
-            self.replay_map_image = Image.open("/home/dfec/Desktop/GUI CAPSTONE/Test2Map.png").convert("RGB")
-            draw = ImageDraw.Draw(self.replay_map_image)
-
-            # Store coordinates and initialize index
-            self.replay_coordinates = coordinates
-            self.replay_index = 0
-
-            def plot_next_point():
-                if self.replay_index < len(self.replay_coordinates):
-                    lat, lon = self.replay_coordinates[self.replay_index]
-                    print(f"Plotting {drone_name} point {self.replay_index + 1}/{len(self.replay_coordinates)}: ({lat}, {lon})")
-
-                    # Convert to pixels
-                    pixel_x, pixel_y = self.convert_to_pixels(lat, lon)
-
-                    # Draw point
-                    draw.ellipse((pixel_x - 5, pixel_y - 5, pixel_x + 5, pixel_y + 5), fill="red", outline="black")
-
-                    # Draw connecting path
-                    if self.replay_index > 0:
-                        prev_lat, prev_lon = self.replay_coordinates[self.replay_index - 1]
-                        prev_x, prev_y = self.convert_to_pixels(prev_lat, prev_lon)
-                        draw.line([(prev_x, prev_y), (pixel_x, pixel_y)], fill="red", width=2)
-
-                    # Update map widget with current replay frame
-                    updated_array = np.array(self.replay_map_image)
-                    updated_pixbuf = GdkPixbuf.Pixbuf.new_from_data(
-                        updated_array.tobytes(),
-                        GdkPixbuf.Colorspace.RGB,
-                        False,
-                        8,
-                        updated_array.shape[1],
-                        updated_array.shape[0],
-                        updated_array.shape[1] * 3,
-                    )
-                    texture = Gdk.Texture.new_for_pixbuf(updated_pixbuf)
-                    self.map_image_widget.set_paintable(texture)
-                    self.content_area.queue_draw()
-
-                    self.replay_index += 1
-                    return True  # Keep replaying
-                else:
-                    print(f"{drone_name.capitalize()} Drone Replay completed.")
-                    return False  # Stop replay
+        self.load_replay(build, f"{drone_name.capitalize()} Drone")
+
+    def replay_tracks(self, file_names):
+        """
+        Replays several saved tracks (e.g. rogue and discovery) together on one clock.
+        """
+        print(f"Synchronized replay initiated for: {', '.join(file_names)}")
 
-            # Start the timed animation
-            GLib.timeout_add(200, plot_next_point)
+        def build():
+            engine = MultiTrackReplay(file_names, "/home/dfec/Desktop/GUI CAPSTONE/Test2Map.png", self.map_projection)
+            print(f"Replaying {len(engine)} tracks over {engine.duration:.1f} s")
+            return engine
 
-        except Exception as e:
-            print(f"Error in replay_points: {e}")
+        self.load_replay(build, "Synchronized")
 
-    def convert_to_pixels(self, lat, lon):
+    def load_replay(self, build, label):
         """
-        Converts latitude and longitude to pixel coordinates on the map.
-        Ensures correct scaling so points are mapped accurately.
+        Builds a replay engine on a background thread, reading and projecting the tracks and decoding
+        the map, and starts it on the main loop. Only the most recent request is started.
+        :param build: Returns the engine, or None if there is nothing to replay.
         """
-        # Define reference points for the top-left, bottom-left, and top-right corners
-        lat1, lon1 = 39.019045, -104.894301  # Top-left
-        lat3, lon3 = 39.017430, -104.894301  # Bottom-left
-        lon2 = -104.892113  # Top-right
+        request = self.replay_request = object()
+
+        def started(engine):
+            if self.replay_request is request:
+                self.start_replay(engine, label)
+            return False  # One-shot idle
+
+        def run():
+            try:
+                engine = build()
+            except Exception as e:
+                print(f"Error loading {label} replay: {e}")
+                return
+            if engine is not None:
+                GLib.idle_add(started, engine)
 
-        # Get map dimensions (match your actual base image size)
-        width, height = 1000, 600  # Adjust these values to match the base image
+        threading.Thread(target=run, daemon=True).start()
 
-        # Calculate the range of latitude and longitude
-        lat_range = lat1 - lat3
-        lon_range = lon2 - lon1
+    def start_replay(self, engine, label):
+        """
+        Runs a replay engine from a frame-rate timer, rendering on the render worker.
+        """
+        self.auto_reload = False  
+        print("Auto-reload permanently disabled during replay.")
+
+        self.replay_engine = engine
+        engine.set_speed(self.replay_speed)
+        engine.resume()
+        self.replay_scale.set_range(engine.start, max(engine.end, engine.start + 0.001))
+        self.replay_scale.set_value(engine.start)
+        self.replay_pause_button.set_label("Pause Replay")
+        last_position = [None]
+
+        def play_frame():
+            if self.replay_engine is not engine:
+                return False  # Replaced by a newer replay
+
+            position = engine.tick()
+            if position != last_position[0]:
+                last_position[0] = position
+                self.replay_scale.set_value(position)
+                # Only the new segment is drawn, on the render worker
+                self.render_worker.submit(lambda: engine.render(position))
+
+            if engine.finished and not engine.paused:
+                print(f"{label} Replay completed.")
+                engine.pause()
+                self.replay_pause_button.set_label("Resume Replay")
+            return True  # Keep the clock running so the replay can still be scrubbed
+
+        # Start the timed animation
+        GLib.timeout_add(int(1000 / self.map_fps), play_frame)
+
+    def on_replay_pause_clicked(self, button):
+        engine = self.replay_engine
+        if engine is None:
+            return
+        if engine.paused:
+            if engine.finished:
+                engine.seek(engine.start)  # Play again from the top
+            engine.resume()
+            button.set_label("Pause Replay")
+        else:
+            engine.pause()
+            button.set_label("Resume Replay")
+
+    def on_replay_speed_changed(self, dropdown):
+        self.replay_speed = REPLAY_SPEEDS[dropdown.get_active()]
+        if self.replay_engine is not None:
+            self.replay_engine.set_speed(self.replay_speed)
+
+    def on_replay_seek(self, scale, scroll, value):
+        if self.replay_engine is not None:
+            self.replay_engine.seek(value)
+        return False  # Let the scale move
 
-        # Convert lat/lon to pixel coordinates
+    def convert_to_pixels(self, lat, lon):
+        """
+        Converts latitude and longitude to pixel coordinates on the map.
+        Uses the projection built from the base image's real size and corner coordinates.
+        """
         try:
-            pixel_x = int(((lon - lon1) / lon_range) * width)
-            pixel_y = int(((lat1 - lat) / lat_range) * height)
-
-            print(f"Lat: {lat}, Lon: {lon} -> Pixel: ({pixel_x}, {pixel_y})")  # Debugging output
-            return pixel_x, pixel_y
+            return self.map_projection.pixel(lat, lon)
         except Exception as e:
             print(f"Error in convert_to_pixels: {e}")
             return 0, 0  # Return (0,0) if an error occurs
     
     def update_map_safe(self, rogue_coordinates, discovery_coordinates):
-        GLib.idle_add(self.update_map, rogue_coordinates, discovery_coordinates)
+        # Thread-safe, replaces any frame still waiting to be drawn
+        self.render_scheduler.submit(rogue_coordinates, discovery_coordinates)
 
 def cv_frame_to_pixbuf(frame):
     """
@@ -825,6 +918,7 @@ class MyApp(Gtk.Application):
 
 def main():
 
+    metrics.enable(METRICS_ENABLED)
     client.start()
     
     discovery_csv_file = "/home/dfec/cuas_24-25/agent_core/disco_position.csv"
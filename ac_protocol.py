@@ -0,0 +1,195 @@
+import json
+import socket
+import struct
+import numpy as np
+from telemetry import RECORD
+
+# Every message on the AgentCore bridge is a little-endian uint32 byte length followed by the payload
+HEADER = struct.Struct("<I")
+MAX_FRAME = 16 * 1024 * 1024
+
+# The client opens the connection with one handshake byte naming the codec it wants. A stock AgentCore
+# only accepts HANDSHAKE_JSON, so binary batches are opt-in for servers that support them. Both payload
+# kinds are always accepted.
+HANDSHAKE_JSON = b"0"
+HANDSHAKE_BINARY = b"1"
+
+# Binary payload: BATCH header (magic, version, reserved, sample count), then `count` samples of
+# BINARY_RECORD packed back to back. 8 + 96 * count bytes, every field 8-byte aligned.
+BATCH = struct.Struct("<2sBBI")
+BATCH_MAGIC = b"TB"
+BATCH_VERSION = 1
+BINARY_RECORD = RECORD.newbyteorder("<")  # The wire layout is RECORD's, little-endian whatever the host
+MAX_BATCH = (MAX_FRAME - BATCH.size) // BINARY_RECORD.itemsize
+
+def encode_frame(payload: bytes) -> bytes:
+    """
+    Prefixes a payload with its length so it can be written to the bridge socket.
+    """
+    if len(payload) > MAX_FRAME:
+        raise ValueError(f"Frame of {len(payload)} bytes exceeds the {MAX_FRAME} byte limit")
+    return HEADER.pack(len(payload)) + payload
+
+def encode_json(message) -> bytes:
+    """
+    Encodes one `[dVals[5], rVals[5], timestamp, mode]` sample as a JSON payload.
+    """
+    return json.dumps(message).encode()
+
+def encode_batch(records) -> bytes:
+    """
+    Encodes an array of telemetry.RECORD (or anything with the same fields) as one binary payload.
+    """
+    records = np.asarray(records)
+    if len(records) > MAX_BATCH:
+        raise ValueError(f"Batch of {len(records)} samples exceeds the {MAX_BATCH} sample limit")
+    packed = np.empty(len(records), dtype=BINARY_RECORD)
+    for name in BINARY_RECORD.names:
+        packed[name] = records[name]
+    return BATCH.pack(BATCH_MAGIC, BATCH_VERSION, 0, len(packed)) + packed.tobytes()
+
+def batch_body(payload: bytes):
+    """
+    Checks a binary payload's header and returns (sample count, the packed samples after it).
+    """
+    if len(payload) < BATCH.size:
+        raise ValueError(f"Telemetry batch of {len(payload)} bytes is shorter than its header")
+    magic, version, _, count = BATCH.unpack_from(payload)
+    if magic != BATCH_MAGIC or version != BATCH_VERSION:
+        raise ValueError(f"Unsupported telemetry batch {magic!r} version {version}")
+    if len(payload) != BATCH.size + count * BINARY_RECORD.itemsize:
+        raise ValueError(f"Telemetry batch of {len(payload)} bytes does not hold {count} samples")
+    return count, memoryview(payload)[BATCH.size:]
+
+def decode_batch(payload: bytes) -> np.ndarray:
+    """
+    Decodes a binary payload into a read-only BINARY_RECORD view of the payload, without copying.
+    """
+    count, body = batch_body(payload)
+    return np.frombuffer(body, dtype=BINARY_RECORD, count=count)
+
+def decode_json(frames) -> np.ndarray:
+    """
+    Decodes JSON `[dVals[5], rVals[5], timestamp, mode]` frames into one array of telemetry.RECORD.
+    Raises ValueError for a frame that is not such a message.
+    """
+    messages = [json.loads(frame) for frame in frames]
+    records = np.empty(len(messages), dtype=RECORD)
+    if messages:
+        try:
+            records["disco"] = [message[0] for message in messages]
+            records["rogue"] = [message[1] for message in messages]
+            records["timestamp"] = [message[2] for message in messages]
+            records["mode"] = [message[3] for message in messages]
+        except (IndexError, KeyError, TypeError) as e:
+            raise ValueError(f"Malformed telemetry message: {e}") from e
+    return records
+
+def decode_frames(frames) -> np.ndarray:
+    """
+    Decodes a list of frame payloads, binary batches and JSON samples in any mix, into one array
+    of telemetry.RECORD in arrival order. Consecutive binary payloads are joined and decoded with
+    a single np.frombuffer, so many small batches cost about as much as one large one.
+    Raises ValueError for a malformed frame.
+    """
+    parts, run, bodies = [], [], []
+
+    def close_run():
+        if run:
+            parts.append(decode_json(run))
+            run.clear()
+        if bodies:
+            parts.append(np.frombuffer(b"".join(bodies), dtype=BINARY_RECORD))
+            bodies.clear()
+
+    for frame in frames:
+        # Binary batches are recognised by their magic, anything else must be JSON
+        if frame[:len(BATCH_MAGIC)] == BATCH_MAGIC:
+            if run:
+                close_run()
+            bodies.append(batch_body(frame)[1])
+        else:
+            if bodies:
+                close_run()
+            run.append(frame)
+    close_run()
+
+    if len(parts) == 1 and parts[0].dtype == RECORD:
+        return parts[0] if parts[0].flags.writeable else parts[0].copy()
+    records = np.empty(sum(len(part) for part in parts), dtype=RECORD)
+    offset = 0
+    for part in parts:
+        records[offset:offset + len(part)] = part  # Same fields in the same order
+        offset += len(part)
+    return records
+
+class FrameReader:
+    """
+    Splits a byte stream from the bridge socket back into frames.
+    Data is received into one reusable buffer, so partial reads, several frames per read and
+    frames larger than a single read are all handled without per-read allocations.
+    """
+
+    def __init__(self, conn: socket.socket = None, buffer_size: int = 64 * 1024):
+        """
+        :param conn: Socket read by read_frames(), None when data is passed to feed() instead.
+        """
+        self.conn = conn
+        self.buffer = bytearray(buffer_size)
+        self.start = 0  # First unconsumed byte
+        self.end = 0  # One past the last received byte
+
+    def make_room(self, needed: int):
+        """
+        Ensures at least `needed` bytes fit after self.start, compacting or growing the buffer.
+        """
+        pending = self.end - self.start
+        if self.start and len(self.buffer) - self.start < needed:
+            self.buffer[:pending] = self.buffer[self.start:self.end]
+            self.start, self.end = 0, pending
+        if len(self.buffer) < needed:
+            self.buffer.extend(bytes(needed - len(self.buffer)))
+
+    def read_frames(self):
+        """
+        Blocks for one socket read and returns the list of complete frame payloads now available.
+        The list may be empty if only part of a frame arrived.
+        Raises ConnectionError when the peer closes the connection.
+        """
+        if self.end == len(self.buffer):
+            self.make_room(len(self.buffer) if self.start else 2 * len(self.buffer))
+
+        received = self.conn.recv_into(memoryview(self.buffer)[self.end:])
+        if received == 0:
+            raise ConnectionError("AgentCore bridge closed the connection")
+        self.end += received
+        return self.split_frames()
+
+    def feed(self, data: bytes):
+        """
+        Adds bytes read elsewhere (e.g. from an asyncio stream) and returns the complete frames, see read_frames().
+        """
+        if not data:
+            raise ConnectionError("AgentCore bridge closed the connection")
+        self.make_room(self.end - self.start + len(data))
+        self.buffer[self.end:self.end + len(data)] = data
+        self.end += len(data)
+        return self.split_frames()
+
+    def split_frames(self):
+        frames = []
+        while self.end - self.start >= HEADER.size:
+            (length,) = HEADER.unpack_from(self.buffer, self.start)
+            if length > MAX_FRAME:
+                raise ValueError(f"Frame of {length} bytes exceeds the {MAX_FRAME} byte limit")
+            frame_end = self.start + HEADER.size + length
+            if frame_end > self.end:
+                # Incomplete frame, make sure the whole of it will fit once it arrives
+                self.make_room(HEADER.size + length)
+                break
+            frames.append(bytes(self.buffer[self.start + HEADER.size:frame_end]))
+            self.start = frame_end
+
+        if self.start == self.end:
+            self.start = self.end = 0
+        return frames
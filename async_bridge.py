@@ -0,0 +1,168 @@
+import socket
+import asyncio
+from gi.repository import GLib
+from ac_protocol import FrameReader, decode_frames, HANDSHAKE_JSON
+from instrumentation import metrics
+
+try:
+    from gi.events import GLibEventLoopPolicy  # PyGObject 3.50+
+except ImportError:
+    GLibEventLoopPolicy = None
+
+class AsyncBridge:
+    """
+    In-process AgentCore bridge client running on the GLib main loop.
+    With a GLib-based asyncio event loop policy the socket reader is an asyncio coroutine sharing
+    the GTK main loop, on older PyGObject the same socket is read from a GLib fd source. Either way
+    every read is decoded into one batch of telemetry.RECORD records and handed to `on_records` on
+    the main thread, so there is no extra process, no polling and nothing to lock.
+    """
+
+    def __init__(self, path: str, on_records, handshake: bytes = HANDSHAKE_JSON, retry: float = 1.0, read_size: int = 64 * 1024):
+        """
+        :param path: UNIX socket of the AgentCore bridge.
+        :param on_records: Called on the main thread with each decoded batch of records.
+        :param handshake: Codec requested when connecting, see ac_protocol.
+        :param retry: Seconds between connection attempts.
+        :param read_size: Largest read from the socket.
+        """
+        self.path = path
+        self.on_records = on_records
+        self.handshake = handshake
+        self.retry = retry
+        self.read_size = read_size
+
+        self.connected = False
+        self.latest = None  # Last record received
+        self.running = False
+        self.task = None
+        self.conn = None
+        self.source = None
+
+    @property
+    def mode(self) -> int:
+        return int(self.latest["mode"]) if self.latest is not None else 0
+
+    @property
+    def timestamp(self) -> float:
+        return float(self.latest["timestamp"]) if self.latest is not None else 0.0
+
+    def start(self):
+        """
+        Starts reading once the GLib main loop runs. Call before the application is run.
+        """
+        self.running = True
+        if GLibEventLoopPolicy is not None:
+            if not isinstance(asyncio.get_event_loop_policy(), GLibEventLoopPolicy):
+                asyncio.set_event_loop_policy(GLibEventLoopPolicy())
+            loop = asyncio.get_event_loop_policy().get_event_loop()
+            self.task = loop.create_task(self.run())
+        else:
+            GLib.idle_add(self.connect)
+
+    def stop(self):
+        self.running = False
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self.disconnect()
+
+    def deliver(self, frames):
+        """
+        Decodes complete frames and hands them on. Raises ValueError for a malformed frame,
+        after which the stream cannot be trusted and the connection is dropped.
+        """
+        if not frames:
+            return
+        with metrics.stage("decode"):
+            records = decode_frames(frames)
+        if not len(records):
+            return  # e.g. a binary batch of zero samples
+        self.latest = records[-1]
+        self.on_records(records)
+
+    # ----- asyncio reader -----
+
+    async def run(self):
+        while self.running:
+            try:
+                stream, writer = await asyncio.open_unix_connection(self.path)
+            except OSError as e:
+                print(f"IPC UNIX socket connection lost: {e}")
+                await asyncio.sleep(self.retry)
+                continue
+
+            try:
+                writer.write(self.handshake)
+                await writer.drain()
+                print(f"Connected on {self.path}")
+                self.connected = True
+
+                reader = FrameReader()
+                while self.running:
+                    # Everything buffered so far arrives in one read and is delivered as one batch
+                    data = await stream.read(self.read_size)
+                    with metrics.stage("receive"):
+                        frames = reader.feed(data)
+                    self.deliver(frames)
+            except (ConnectionError, ValueError, OSError) as e:
+                print(f"IPC UNIX socket connection lost: {e}")
+            finally:
+                self.connected = False
+                writer.close()
+            await asyncio.sleep(self.retry)
+
+    # ----- GLib fd source reader -----
+
+    def connect(self):
+        if not self.running:
+            return False
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conn.connect(self.path)
+            conn.sendall(self.handshake)
+        except OSError as e:
+            print(f"IPC UNIX socket connection lost: {e}")
+            conn.close()
+            GLib.timeout_add(int(self.retry * 1000), self.connect)
+            return False
+
+        print(f"Connected on {self.path}")
+        conn.setblocking(False)
+        self.conn = conn
+        self.connected = True
+        self.reader = FrameReader(conn, self.read_size)
+        self.source = GLib.unix_fd_add_full(GLib.PRIORITY_DEFAULT, conn.fileno(),
+                                            GLib.IOCondition.IN | GLib.IOCondition.HUP | GLib.IOCondition.ERR,
+                                            self.on_readable)
+        return False
+
+    def on_readable(self, fd, condition):
+        try:
+            with metrics.stage("receive"):
+                frames = self.reader.read_frames()
+            self.deliver(frames)
+            return True
+        except BlockingIOError:
+            return True
+        except (ConnectionError, ValueError, OSError) as e:
+            print(f"IPC UNIX socket connection lost: {e}")
+
+        self.source = None  # Removed by returning False
+        self.disconnect()
+        if self.running:
+            GLib.timeout_add(int(self.retry * 1000), self.connect)
+        return False
+
+    def disconnect(self):
+        if self.source is not None:
+            GLib.source_remove(self.source)
+            self.source = None
+        if self.conn is not None:
+            try:
+                self.conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.conn.close()
+            self.conn = None
+        self.connected = False
@@ -0,0 +1,163 @@
+"""
+Renders saved sorties to images or frame sequences without the GUI, several files at once.
+
+    python batch_render.py RogueCoords.csv DiscoveryCoords.csv -o renders      # final track images
+    python batch_render.py "/home/dfec/Desktop/GUI CAPSTONE" -o renders       # every track in a folder
+    python batch_render.py sortie.csv --frames --fps 30 --speed 10            # PNG frame sequence
+    python batch_render.py sortie.csv --frames --pipe "ffmpeg -loglevel error -y -f rawvideo -pix_fmt rgba
+        -s {width}x{height} -r {fps} -i - {output}.mp4"                      # raw frames to an encoder
+"""
+import os, sys, time, shlex, argparse, functools, subprocess
+import numpy as np
+from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
+from coords import read_track
+from map_render import MapProjection
+from replay import ReplayEngine
+from replay_library import TRACK_EXTENSIONS
+
+BASE_MAP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Test2Map.png")
+
+@functools.lru_cache(maxsize=2)
+def load_map(map_path: str):
+    """
+    Decoded base map and its projection, loaded once per worker process.
+    """
+    base = Image.open(map_path).convert("RGBA")
+    return base, MapProjection(base.width, base.height)
+
+def save_png(engine: ReplayEngine, file_path: str):
+    # The map is opaque, RGB encodes faster than RGBA
+    engine.canvas.convert("RGB").save(file_path, compress_level=1)
+
+def track_color(file_path: str) -> str:
+    # Same colors as the in-app replay
+    return "green" if "disco" in os.path.basename(file_path).lower() else "red"
+
+def find_tracks(inputs):
+    """
+    Expands the command line inputs to track files, directories to the tracks directly inside them.
+    """
+    paths = []
+    for path in inputs:
+        if os.path.isdir(path):
+            paths.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if name.lower().endswith(TRACK_EXTENSIONS)))
+        else:
+            paths.append(path)
+    return paths
+
+def output_names(paths):
+    """
+    One output name per track, the file name without its extension, numbered if names collide.
+    """
+    names, seen = [], {}
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        seen[name] = seen.get(name, 0) + 1
+        names.append(name if seen[name] == 1 else f"{name}_{seen[name]}")
+    return names
+
+def frame_positions(engine: ReplayEngine, fps: float, speed: float):
+    """
+    Track times of the frames of a playback at `speed` times real time, ending on the last point.
+    """
+    step = speed / fps
+    positions = engine.start + step * np.arange(int((engine.end - engine.start) / step) + 1)
+    if not len(positions) or positions[-1] < engine.end:
+        positions = np.append(positions, engine.end)
+    return positions.tolist()
+
+def render_track(task):
+    """
+    Renders one track, in a pool worker.
+    :param task: (track path, output path without extension, options dict)
+    :return: Summary dict, with an "error" entry if the track could not be rendered.
+    """
+    file_path, output, options = task
+    started = time.perf_counter()
+    summary = {"file": file_path, "output": None, "points": 0, "frames": 0}
+    try:
+        base, projection = load_map(options["map"])
+        times, latitudes, longitudes = read_track(file_path)
+        if not len(times):
+            raise ValueError("no coordinates found")
+        engine = ReplayEngine(times, latitudes, longitudes, base, projection, track_color(file_path))
+        summary["points"] = len(engine)
+
+        if not options["frames"]:
+            engine.render(engine.end)
+            summary["output"] = output + ".png"
+            save_png(engine, summary["output"])
+            summary["frames"] = 1
+        elif options["pipe"]:
+            height, width = engine.frame_buffer.shape[:2]
+            fields = {"width": width, "height": height, "fps": options["fps"], "output": output,
+                      "name": os.path.basename(output)}
+            command = [argument.format(**fields) for argument in shlex.split(options["pipe"])]
+            encoder = subprocess.Popen(command, stdin=subprocess.PIPE)
+            try:
+                for position in frame_positions(engine, options["fps"], options["speed"]):
+                    encoder.stdin.write(engine.render(position).tobytes())
+                    summary["frames"] += 1
+            finally:
+                encoder.stdin.close()
+                if encoder.wait():
+                    raise RuntimeError(f"{command[0]} exited with status {encoder.returncode}")
+            summary["output"] = output
+        else:
+            os.makedirs(output, exist_ok=True)
+            for frame, position in enumerate(frame_positions(engine, options["fps"], options["speed"])):
+                engine.render(position)
+                save_png(engine, os.path.join(output, f"frame_{frame:06d}.png"))
+            summary["frames"] = frame + 1
+            summary["output"] = output
+    except Exception as e:
+        summary["error"] = str(e)
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+def render_all(paths, output_dir: str, options: dict, jobs: int = None):
+    """
+    Renders every track over a process pool, yielding the summaries in input order.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [(path, os.path.join(output_dir, name), options) for path, name in zip(paths, output_names(paths))]
+    if jobs == 1 or len(tasks) == 1:
+        yield from map(render_track, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(render_track, tasks)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="track files (CSV, XLSX, .trk) or directories of them")
+    parser.add_argument("-o", "--output", default="renders", help="output directory")
+    parser.add_argument("--map", default=BASE_MAP, help="base map image")
+    parser.add_argument("--frames", action="store_true", help="render the playback as frames instead of one final image")
+    parser.add_argument("--fps", type=float, default=30.0, help="frames per second of playback")
+    parser.add_argument("--speed", type=float, default=10.0, help="playback speed, times real time")
+    parser.add_argument("--pipe", help="encoder command reading raw RGBA frames on stdin, with {width} {height} "
+                                       "{fps} {output} and {name} placeholders, instead of PNG files")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes, all CPUs by default")
+    args = parser.parse_args(argv)
+
+    paths = find_tracks(args.inputs)
+    if not paths:
+        parser.error("no track files found")
+    options = {"map": args.map, "frames": args.frames, "fps": args.fps, "speed": args.speed, "pipe": args.pipe}
+
+    started = time.perf_counter()
+    failed = 0
+    for summary in render_all(paths, args.output, options, args.jobs):
+        if "error" in summary:
+            failed += 1
+            print(f"Error rendering {summary['file']}: {summary['error']}")
+        else:
+            print(f"Rendered {summary['file']}: {summary['points']} points, {summary['frames']} frame(s) "
+                  f"-> {summary['output']} ({summary['seconds']:.2f} s)")
+    print(f"Rendered {len(paths) - failed}/{len(paths)} tracks in {time.perf_counter() - started:.2f} s")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
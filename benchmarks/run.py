@@ -0,0 +1,290 @@
+"""
+Benchmark suite: headless timings of the map pipeline on synthetic tracks of growing length.
+
+Covers track parsing (read_coordinates/read_track), projection, live frame rendering (the
+update_map path), replay loading and frames (the replay_points path), frame -> texture conversion
+and telemetry ingestion from a fake AgentCore server through client.internal_runner. Results are
+printed as JSON, pass a previous run as --baseline to compare.
+
+    python benchmarks/run.py [--sizes 1000 10000 100000 1000000 10000000] [--only parse render ...]
+                             [--output results.json] [--baseline previous.json]
+"""
+import os, sys, json, time, socket, contextlib, platform, argparse, tempfile, threading, subprocess, multiprocessing
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from synthetic import cached_track_csv, synthetic_track
+from coords import read_coordinates, read_track
+from map_render import MapProjection, MapRenderer
+from replay import ReplayEngine
+from telemetry import TelemetryRing, TrackStore, RECORD
+from ac_protocol import FrameReader, encode_frame, encode_json, encode_batch, decode_frames, HANDSHAKE_JSON, HANDSHAKE_BINARY
+
+try:
+    import gi
+    gi.require_version("Gdk", "4.0")
+    from render_worker import RenderWorker
+except (ImportError, ValueError):
+    gi = None
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+SEGMENT = 50_000  # Points between BREAK lines in the synthetic CSVs
+FRAME_POINTS = 5  # New points per live frame, one second of telemetry at 5 Hz
+LIVE_FRAMES = 100
+REPLAY_FRAMES = 200
+MAP = os.path.join(ROOT, "Test2Map.png")
+ICONS = {"rogue": "RogueDrone_Transparent.png", "discovery": "DiscoveryDrone_Transparent.png"}
+
+def best_of(function, repeat: int):
+    """
+    Runs `function` `repeat` times and returns (fastest time in seconds, last result).
+    """
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def result(name: str, points: int, seconds: float, **extra):
+    entry = {"name": name, "points": points, "seconds": round(seconds, 6),
+             "per_second": round(points / seconds, 1) if seconds > 0 else None}
+    entry.update(extra)
+    return entry
+
+def load_icons():
+    return {name: Image.open(os.path.join(ROOT, file_name)).convert("RGBA").resize((50, 50), Image.LANCZOS)
+            for name, file_name in ICONS.items()}
+
+def track_store(points: int, seed: int) -> TrackStore:
+    store = TrackStore()
+    store.extend(*synthetic_track(points, seed))
+    return store
+
+# ----- Benchmarks, each returns a list of results for one track length -----
+
+def bench_parse(points: int, args):
+    """
+    read_coordinates only keeps segments under a Time header, so the Latitude,Longitude file is
+    timed through read_track. Every case must parse the whole track, or its timing means nothing.
+    """
+    timed_csv = cached_track_csv(args.data, points, True, SEGMENT)
+    latlon_csv = cached_track_csv(args.data, points, False, SEGMENT)
+    results = []
+    for name, parse in (("parse.read_coordinates.timed", lambda: read_coordinates(timed_csv)),
+                        ("parse.read_track.timed", lambda: read_track(timed_csv)[0]),
+                        ("parse.read_track.latlon", lambda: read_track(latlon_csv)[0])):
+        seconds, parsed = best_of(parse, args.repeat)
+        if len(parsed) != points:
+            raise RuntimeError(f"{name} parsed {len(parsed)} of {points} points")
+        results.append(result(name, points, seconds))
+    return results
+
+def bench_projection(points: int, args):
+    projection = MapProjection.for_image(MAP)
+    _, latitudes, longitudes = synthetic_track(points)
+    return [result("projection.project", points, best_of(lambda: projection.project(latitudes, longitudes), args.repeat)[0])]
+
+def bench_render(points: int, args):
+    """
+    First frame of a whole track, then the steady state of FRAME_POINTS new points per frame.
+    """
+    icons = load_icons()
+    rogue, discovery = track_store(points, 0), track_store(points, 1)
+    tracks = {"rogue": rogue.snapshot(), "discovery": discovery.snapshot()}
+
+    renderer = MapRenderer(MAP, icons)
+    first, _ = best_of(lambda: (renderer.reset(), renderer.render(tracks)), args.repeat)
+
+    times, latitudes, longitudes = synthetic_track(points + FRAME_POINTS * LIVE_FRAMES, 0)
+    started = time.perf_counter()
+    for frame in range(LIVE_FRAMES):
+        new = slice(points + frame * FRAME_POINTS, points + (frame + 1) * FRAME_POINTS)
+        rogue.extend(times[new], latitudes[new], longitudes[new])
+        renderer.render({"rogue": rogue.snapshot(), "discovery": discovery.snapshot()})
+    per_frame = (time.perf_counter() - started) / LIVE_FRAMES
+
+    return [
+        result("render.first_frame", 2 * points, first),
+        result("render.frame", 2 * points, per_frame, fps=round(1 / per_frame, 1)),
+    ]
+
+def bench_replay(points: int, args):
+    timed_csv = cached_track_csv(args.data, points, True, SEGMENT)
+    projection = MapProjection.for_image(MAP)
+    load, engine = best_of(lambda: ReplayEngine.load(timed_csv, MAP, projection), args.repeat)
+
+    positions = np.linspace(engine.start, engine.end, REPLAY_FRAMES)
+    started = time.perf_counter()
+    for position in positions.tolist():
+        engine.render(position)
+    per_frame = (time.perf_counter() - started) / REPLAY_FRAMES
+
+    return [
+        result("replay.load", points, load),
+        result("replay.frame", points, per_frame, fps=round(1 / per_frame, 1)),
+    ]
+
+def bench_texture(points: int, args):
+    """
+    Frame buffer -> Gdk.MemoryTexture, or only the Python side of it without PyGObject.
+    Independent of the track length, so only run once.
+    """
+    if points != args.sizes[0]:
+        return []
+    frame_buffer = np.array(Image.open(MAP).convert("RGBA"))
+    convert = RenderWorker.to_texture if gi is not None else (lambda frame: frame.tobytes())
+    seconds, _ = best_of(lambda: convert(frame_buffer), max(args.repeat, 20))
+    height, width = frame_buffer.shape[:2]
+    return [result("texture.to_texture", width * height, seconds, gtk=gi is not None, frame=[width, height])]
+
+def serve_fake(path: str, count: int, ready):
+    from fake_agentcore import FakeAgentCore
+    server = FakeAgentCore(path, rate=0, count=count, burst=256)
+    ready.set()
+    try:
+        server.serve()
+    finally:
+        server.stop()
+
+def bench_ingest(points: int, args):
+    """
+    Samples per second through client.internal_runner from a fake AgentCore in another process,
+    and decoding alone for the same stream already in memory.
+    """
+    import client
+
+    if client.ring is None:
+        client.ring = TelemetryRing()  # Normally made by client.start() in process mode
+    count = min(points, args.ingest_max)
+    path = os.path.join(tempfile.gettempdir(), f"ac_bench_{os.getpid()}")
+    results = []
+    for codec, handshake in (("json", HANDSHAKE_JSON), ("binary", HANDSHAKE_BINARY)):
+        ready = multiprocessing.Event()
+        server = multiprocessing.Process(target=serve_fake, args=(path, count, ready), daemon=True)
+        server.start()
+        ready.wait(10)
+
+        first = client.ring.sequence
+        started = time.perf_counter()
+        runner = threading.Thread(target=client.internal_runner, daemon=True, args=(
+            client.dVals, client.rVals, client.mode, client.state, client.time, path, client.ring, handshake))
+        runner.start()
+        deadline = None
+        while client.ring.sequence - first < count:
+            if deadline is None and not server.is_alive():
+                deadline = time.perf_counter() + 2.0  # Let the runner read what the server sent before closing
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            time.sleep(0.001)
+        seconds = time.perf_counter() - started
+        received = client.ring.sequence - first
+        client.ring.drain()
+
+        client.state[1] = 0  # Stop the runner before the next one starts
+        server.join(10)
+        runner.join(5)
+        results.append(result(f"ingest.socket.{codec}", received, seconds))
+
+        # The same stream decoded straight from memory, no socket or server
+        records = np.zeros(count, dtype=RECORD)
+        records["timestamp"], records["disco"][:, 0], records["disco"][:, 1] = synthetic_track(count)
+        if codec == "json":
+            stream = b"".join(encode_frame(encode_json([disco.tolist(), rogue.tolist(), float(timestamp), int(mode)]))
+                              for timestamp, mode, disco, rogue in records.tolist())
+        else:
+            stream = b"".join(encode_frame(encode_batch(records[start:start + 256])) for start in range(0, count, 256))
+
+        def decode():
+            reader = FrameReader()
+            return sum(len(decode_frames(reader.feed(stream[start:start + 65536])))
+                       for start in range(0, len(stream), 65536))
+        seconds, decoded = best_of(decode, args.repeat)
+        results.append(result(f"ingest.decode.{codec}", decoded, seconds, bytes=len(stream)))
+    return results
+
+BENCHMARKS = {
+    "parse": bench_parse,
+    "projection": bench_projection,
+    "render": bench_render,
+    "replay": bench_replay,
+    "texture": bench_texture,
+    "ingest": bench_ingest,
+}
+
+def metadata(args):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "host": socket.gethostname(),
+        "gtk": gi is not None,
+        "sizes": list(args.sizes),
+        "repeat": args.repeat,
+    }
+
+def compare(baseline: dict, results, tolerance: float) -> int:
+    """
+    Prints how each result changed against a previous run. Returns the number of regressions,
+    results more than `tolerance` times slower than their baseline.
+    """
+    previous = {(entry["name"], entry["points"]): entry["seconds"] for entry in baseline.get("results", [])}
+    regressions = 0
+    for entry in results:
+        before = previous.get((entry["name"], entry["points"]))
+        if not before or not entry["seconds"]:
+            continue
+        ratio = entry["seconds"] / before
+        slower = ratio > tolerance
+        regressions += slower
+        print(f"{entry['name']:32} {entry['points']:>10}  {before:10.4f}s -> {entry['seconds']:10.4f}s  x{ratio:5.2f}"
+              f"{'  SLOWER' if slower else ''}", file=sys.stderr)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless GUI pipeline benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="track lengths in points")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="benchmarks to run, all by default")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing, the fastest is kept")
+    parser.add_argument("--ingest-max", type=int, default=200_000, help="largest sample count streamed through the socket")
+    parser.add_argument("--data", default=os.path.join(tempfile.gettempdir(), "gui_benchmarks"), help="synthetic track cache")
+    parser.add_argument("--output", help="write the JSON results here as well as to stdout")
+    parser.add_argument("--baseline", help="previous JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.2, help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+    args.sizes = sorted(args.sizes)
+
+    results = []
+    with contextlib.redirect_stdout(sys.stderr):  # Messages from the code under test stay out of the JSON
+        for points in args.sizes:
+            for name in args.only or BENCHMARKS:
+                print(f"{name} {points}...")
+                results.extend(BENCHMARKS[name](points, args))
+
+    if "client" in sys.modules:
+        sys.modules["client"].stop()
+
+    report = {"meta": metadata(args), "results": results}
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            regressions = compare(json.load(file), results, args.tolerance)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
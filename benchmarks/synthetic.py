@@ -0,0 +1,97 @@
+"""
+Synthetic track generator for benchmarks.
+
+Writes CSV tracks shaped like the recorded ones: "Latitude,Longitude" files like RogueCoords.csv or
+"Time,Latitude,Longitude" files with MM:SS.f clock times like RogueCoords_Downsampled_Every5.csv,
+split into segments by BREAK lines followed by a repeated header. Points wander smoothly inside
+the map corners so every one of them projects onto the map.
+
+    python benchmarks/synthetic.py OUTPUT.csv --points 1000000 [--untimed] [--segment 5000]
+"""
+import os, sys, argparse
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from map_render import MAP_CORNERS
+
+SAMPLE_INTERVAL = 0.2  # Seconds between samples, the AgentCore position rate
+WRITE_ROWS = 1 << 20  # Rows formatted per write
+
+def synthetic_track(points: int, seed: int = 0, interval: float = SAMPLE_INTERVAL, corners=MAP_CORNERS):
+    """
+    A smooth pseudo-random flight inside the map.
+    :return: (times, latitudes, longitudes) float64 arrays, times in seconds from 0.
+    """
+    rng = np.random.default_rng(seed)
+    (north, west), (south, _), (_, east) = corners
+    center_lat, center_lon = (north + south) / 2, (west + east) / 2
+    span_lat, span_lon = (north - south) / 2, (east - west) / 2
+
+    # Two slow orbits plus a bounded random drift, so consecutive points are close but the path never repeats
+    steps = np.arange(points, dtype=np.float64)
+    drift = np.cumsum(rng.normal(0.0, 0.002, (points, 2)), axis=0)
+    drift = np.sin(drift)  # Keep the drift within [-1, 1]
+    latitudes = center_lat + span_lat * (0.5 * np.sin(steps * 0.0011) + 0.25 * np.sin(steps * 0.0173) + 0.2 * drift[:, 0])
+    longitudes = center_lon + span_lon * (0.5 * np.cos(steps * 0.0013) + 0.25 * np.cos(steps * 0.0191) + 0.2 * drift[:, 1])
+    return steps * interval, latitudes, longitudes
+
+def format_clock(times):
+    """
+    Seconds -> "MM:SS.f" clock strings as written by the telemetry logger, wrapping every hour.
+    """
+    tenths = np.round(np.asarray(times) * 10).astype(np.int64) % 36000
+    return [f"{minutes:02d}:{seconds:02d}.{tenth}" for minutes, seconds, tenth
+            in zip((tenths // 600).tolist(), (tenths // 10 % 60).tolist(), (tenths % 10).tolist())]
+
+def write_track_csv(file_path: str, points: int, timed: bool = True, segment: int = None, seed: int = 0):
+    """
+    Writes a synthetic track CSV.
+    :param timed: Write a Time column ("Time,Latitude,Longitude"), otherwise "Latitude,Longitude".
+    :param segment: Points per segment, a BREAK line and a new header follow each one. None for no BREAKs.
+    :return: file_path
+    """
+    times, latitudes, longitudes = synthetic_track(points, seed)
+    header = "Time,Latitude,Longitude\n" if timed else "Latitude,Longitude\n"
+    segment = segment or points or 1
+
+    with open(file_path, "w", encoding="utf-8") as file:
+        file.write(header)
+        for start in range(0, points, WRITE_ROWS):
+            end = min(start + WRITE_ROWS, points)
+            columns = [latitudes[start:end].tolist(), longitudes[start:end].tolist()]
+            if timed:
+                rows = map("{},{:.8f},{:.7f}\n".format, format_clock(times[start:end]), *columns)
+            else:
+                rows = map("{:.8f},{:.7f}\n".format, *columns)
+            for index, row in enumerate(rows, start):
+                if index and index % segment == 0:
+                    file.write("BREAK\n" + header)
+                file.write(row)
+    return file_path
+
+def cached_track_csv(directory: str, points: int, timed: bool = True, segment: int = None, seed: int = 0) -> str:
+    """
+    Path of a synthetic track in `directory`, generated on first use. Large tracks take a while to write.
+    """
+    name = f"synthetic_{'timed' if timed else 'latlon'}_{points}_{segment or 0}_{seed}.csv"
+    file_path = os.path.join(directory, name)
+    if not os.path.exists(file_path):
+        os.makedirs(directory, exist_ok=True)
+        write_track_csv(file_path + ".tmp", points, timed, segment, seed)
+        os.replace(file_path + ".tmp", file_path)
+    return file_path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic track CSV")
+    parser.add_argument("output")
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--untimed", action="store_true", help="Latitude,Longitude only, like RogueCoords.csv")
+    parser.add_argument("--segment", type=int, default=None, help="points between BREAK lines")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    write_track_csv(args.output, args.points, not args.untimed, args.segment, args.seed)
+    print(f"Wrote {args.points} points to {args.output}")
+
+if __name__ == "__main__":
+    sys.exit(main())
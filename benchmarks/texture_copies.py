@@ -0,0 +1,89 @@
+"""
+Microbenchmark: bytes copied and time spent per frame turning a rendered map into a texture.
+
+Compares the old update_map path (np.array -> tobytes -> Pixbuf.new_from_data ->
+Texture.new_for_pixbuf) with the RenderWorker path (reusable RGBA frame buffer -> tobytes ->
+GLib.Bytes -> Gdk.MemoryTexture). Python-side copies are measured with tracemalloc. GTK-side copies are
+timed when PyGObject is available, otherwise only the Python side is run.
+
+    python benchmarks/texture_copies.py [--frames N] [--map Test2Map.png]
+"""
+import os, sys, time, json, argparse, tracemalloc
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    import gi
+    gi.require_version("Gdk", "4.0")
+    from gi.repository import Gdk, GdkPixbuf, GLib
+except (ImportError, ValueError):
+    gi = None
+
+def old_path(rgb_frame):
+    updated_array = np.array(rgb_frame)
+    data = updated_array.tobytes()
+    if gi is not None:
+        pixbuf = GdkPixbuf.Pixbuf.new_from_data(
+            data, GdkPixbuf.Colorspace.RGB, False, 8,
+            updated_array.shape[1], updated_array.shape[0], updated_array.shape[1] * 3,
+        )
+        return Gdk.Texture.new_for_pixbuf(pixbuf)
+    return data
+
+def new_path(frame_buffer):
+    data = frame_buffer.tobytes()
+    if gi is not None:
+        height, width = frame_buffer.shape[:2]
+        return Gdk.MemoryTexture.new(width, height, Gdk.MemoryFormat.R8G8B8A8, GLib.Bytes.new(data), width * 4)
+    return data
+
+def measure(convert, frame, frames):
+    """
+    Returns (python bytes allocated per frame, milliseconds per frame).
+    """
+    tracemalloc.start()
+    allocated = 0
+    for _ in range(frames):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = convert(frame)
+        allocated += tracemalloc.get_traced_memory()[1] - before
+        del result
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for _ in range(frames):
+        convert(frame)
+    elapsed = (time.perf_counter() - started) / frames
+    return allocated // frames, elapsed * 1000
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--map", default=os.path.join(ROOT, "Test2Map.png"))
+    args = parser.parse_args(argv)
+
+    rgba = Image.open(args.map).convert("RGBA")
+    rgb = rgba.convert("RGB")
+    frame_buffer = np.array(rgba)
+    width, height = rgba.size
+
+    old_bytes, old_ms = measure(old_path, rgb, args.frames)
+    new_bytes, new_ms = measure(new_path, frame_buffer, args.frames)
+
+    # Copies GTK makes that tracemalloc cannot see: new_from_data marshals the bytes into a
+    # fresh buffer and new_for_pixbuf copies/converts the pixels again, GLib.Bytes.new copies once
+    old_gtk = 2 * width * height * 3 if gi is not None else 0
+    new_gtk = width * height * 4 if gi is not None else 0
+
+    print(json.dumps({
+        "frame": [width, height],
+        "gtk": gi is not None,
+        "old": {"python_bytes": old_bytes, "gtk_bytes": old_gtk, "total_bytes": old_bytes + old_gtk, "ms": round(old_ms, 3)},
+        "new": {"python_bytes": new_bytes, "gtk_bytes": new_gtk, "total_bytes": new_bytes + new_gtk, "ms": round(new_ms, 3)},
+    }, indent=2))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,9 +4,14 @@
 import sys
 import multiprocessing
 from multiprocessing.sharedctypes import SynchronizedArray, Synchronized
-from typing import Tuple, List
+from typing import Tuple, List, Callable
+from telemetry import TelemetryRing, TrackStore, TrackSnapshot
+from instrumentation import metrics
 
 SOCKET = "/tmp/ac_bridge"
+TRACK_RETENTION = 1_000_000 # points kept per track, oldest are evicted first
+BRIDGE_MODE = "process" # "process": internal_runner in its own process, "async": in-process reader on the GLib main loop, opt-in
+HANDSHAKE = b"0" # JSON, what a stock AgentCore expects; ac_protocol.HANDSHAKE_BINARY (b"1") opts in to binary batches on servers that support them
 
 standalone: bool = False
 dVals: SynchronizedArray = multiprocessing.Array('d', 5)
@@ -14,89 +19,174 @@ rVals: SynchronizedArray = multiprocessing.Array('d', 5)
 mode: Synchronized = multiprocessing.Value('i')
 time:  SynchronizedArray = multiprocessing.Array('d', 2)
 state: SynchronizedArray = multiprocessing.Array('i', 3)
+ring: TelemetryRing = None # every sample, drained by getVals(), created by start() in process mode
 
 state[0] = 0 # connection down
 state[1] = 1 # spin
 
-rogue: List[Tuple[float, float]] = list()
-disco: List[Tuple[float, float]] = list()
+listeners: List[Callable] = [] # called with each batch of received records
+subscribers: List[Callable] = [] # called with (disco, rogue) snapshots as records arrive, async mode only
+bridge = None # AsyncBridge in async mode
+p1 = None # internal_runner process in process mode
+rogue: TrackStore = TrackStore(max_points=TRACK_RETENTION)
+disco: TrackStore = TrackStore(max_points=TRACK_RETENTION)
 time[0] = 0.0
 time[1] = 0.0
 
-def internal_runner(dVals: SynchronizedArray, rVals: SynchronizedArray, mode: Synchronized, state: SynchronizedArray, time: Synchronized, path: str):
+def internal_runner(dVals: SynchronizedArray, rVals: SynchronizedArray, mode: Synchronized, state: SynchronizedArray, time: Synchronized, path: str, ring: TelemetryRing, handshake: bytes = HANDSHAKE):
     import socket
-    import json
+    from time import sleep
+    from ac_protocol import FrameReader, decode_frames
 
-    try:
-        def conn_kill(conx: socket.socket):
+    def conn_kill(conx: socket.socket):
+        try:
             conx.shutdown(socket.SHUT_RDWR)
-            conx.close()
+        except OSError:
+            pass
+        conx.close()
 
+    try:
         state[0] = 0 # connection down
         state[1] = 1 # module busys
 
-        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-        client.connect(path)
-        client.sendall("0".encode())
-        print(f"Connected on {path}")
-        
-        state[0] = 1 # connection up
-
-        try:
-            while state[1] == 1: # while spinning
-                connection = client.accept()[0]
-                data = connection.recv(1024)
-                msg: Tuple[List[float], List[float], float, int] = tuple(json.loads(data))
-                time[1] = time[0]
-                for i in range(5):
-                    dVals[i] = msg[0][i]
-                    rVals[i] = msg[1][i]
-                time[0] = float(msg[2])
-                mode.value = int(msg[3])
-        except InterruptedError:
-            print("IPC UNIX socket connection closed")
-            conn_kill(connection)
-        except KeyboardInterrupt:
-            print("Exiting")
-            conn_kill(connection)
+        while state[1] == 1: # while spinning
+            # One persistent connection, re-established only if AgentCore drops it
+            client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                client.connect(path)
+                client.sendall(handshake)
+                print(f"Connected on {path}")
+
+                state[0] = 1 # connection up
+                reader = FrameReader(client)
+
+                while state[1] == 1:
+                    records = decode_frames(reader.read_frames())
+                    if not len(records):
+                        continue
+                    ring.extend(records)
+                    # The shared values only ever show the latest sample
+                    last = records[-1]
+                    time[1] = float(records[-2]["timestamp"]) if len(records) > 1 else time[0]
+                    dVals[:] = last["disco"].tolist()
+                    rVals[:] = last["rogue"].tolist()
+                    time[0] = float(last["timestamp"])
+                    mode.value = int(last["mode"])
+            except (ConnectionError, FileNotFoundError, ValueError) as e:
+                # A malformed frame leaves the stream out of step, so it is dropped like a lost connection
+                print(f"IPC UNIX socket connection lost: {e}")
+                state[0] = 0 # connection down
+                sleep(1)
+            except InterruptedError:
+                print("IPC UNIX socket connection closed")
+                break
+            finally:
+                conn_kill(client)
+    except KeyboardInterrupt:
+        print("Exiting")
     finally:
+        state[0] = 0 # connection down
         sys.exit(0)
 
-def getVals():
-    if time[0] != time[1]:
-        disco.append((dVals[0], dVals[1]))
-        if rVals[0] != 0.0:
-            rogue.append((rVals[0], rVals[1]))
-    return disco, rogue
+def ingest(records):
+    for listener in listeners:
+        listener(records)
+    d = records["disco"]
+    disco.extend(records["timestamp"], d[:, 0], d[:, 1])
+    seen = records["rogue"][:, 0] != 0.0
+    r = records["rogue"][seen]
+    rogue.extend(records["timestamp"][seen], r[:, 0], r[:, 1])
+
+def getVals() -> Tuple[TrackSnapshot, TrackSnapshot]:
+    # Every record written since the last call, not just the latest sample
+    with metrics.stage("getVals"):
+        for records in ring.drain() if ring is not None else ():
+            ingest(records)
+        return disco.snapshot(), rogue.snapshot()
+
+def on_records(records):
+    # Async mode: called on the GLib main loop with each batch the bridge decoded
+    with metrics.stage("getVals"):
+        ingest(records)
+        snapshots = (disco.snapshot(), rogue.snapshot()) if subscribers else ()
+    for subscriber in subscribers:
+        subscriber(*snapshots)
+
+def addListener(listener: Callable):
+    listeners.append(listener)
+
+def subscribe(subscriber: Callable):
+    """
+    Registers subscriber(disco, rogue) to be called with fresh track snapshots whenever records arrive.
+    Only the async bridge pushes updates, in process mode getVals() has to be polled.
+    """
+    subscribers.append(subscriber)
+
+def setRetention(max_points: int = None, max_age: float = None):
+    for track in (disco, rogue):
+        track.max_points = max_points
+        track.max_age = max_age
 
 # def getVals():
 #     return (dVals[0], dVals[1]), (rVals[0], rVals[1])
 
 def getMode() -> int:
+    if bridge is not None:
+        return bridge.mode
     return mode.value
 
 def getTimestamp():
+    if bridge is not None:
+        return bridge.timestamp
     return float(time[0])
 
+def getOverruns() -> int:
+    return ring.overruns if ring is not None else 0
+
 def isConnected():
+    if bridge is not None:
+        return bridge.connected
     return True if state[0] == 1 else False
 
-def unix_handler(sig, frame):
+def stop():
+    """
+    Stops the bridge and unlinks the shared memory ring, safe to call more than once.
+    """
+    global p1, ring
     state[1] = 0 # stop
     state[0] = 0 # connection down
-    p1.terminate()
-    try:
-        p1.kill()
-    finally:
-        p1.join()
-        p1.close()
+    if bridge is not None:
+        bridge.stop()
+    if p1 is not None:
+        p1.terminate()
+        try:
+            p1.kill()
+        finally:
+            p1.join()
+            p1.close()
+            p1 = None
+    if ring is not None:
+        ring.close()
+        ring = None
+
+def unix_handler(sig, frame):
+    stop()
     sys.exit(0)
 
-def start():
-    import signal
-    global p1
-    
-    p1 = multiprocessing.Process(None, internal_runner, None, (dVals, rVals, mode, state, time, SOCKET), daemon=True)
+def start(bridge_mode: str = BRIDGE_MODE):
+    import signal, atexit
+    global p1, bridge, ring
+
+    atexit.register(stop) # the ring's shared memory outlives the process unless it is unlinked
+    if bridge_mode == "async":
+        from async_bridge import AsyncBridge
+        bridge = AsyncBridge(SOCKET, on_records, HANDSHAKE)
+        signal.signal(signal.SIGINT, unix_handler)
+        bridge.start()
+        return
+
+    ring = TelemetryRing()
+    p1 = multiprocessing.Process(None, internal_runner, None, (dVals, rVals, mode, state, time, SOCKET, ring, HANDSHAKE), daemon=True)
 
     signal.signal(signal.SIGINT, unix_handler)
         
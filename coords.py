@@ -0,0 +1,551 @@
+import os, csv, re, datetime
+import numpy as np
+import openpyxl
+from collections import OrderedDict
+from typing import List, Tuple
+from track_format import is_track_file, read_track_file, TrackFile
+
+CSV_BLOCK_SIZE = 1 << 24  # Characters parsed per block by the bulk CSV parser
+XLSX_CACHE_SIZE = 8  # Parsed workbooks kept in memory, keyed by path, mtime and size
+xlsx_cache = OrderedDict()
+
+def clean_coordinate(value):
+    """
+    Cleans a coordinate string by ensuring correct decimal placement and preventing unnecessary float rounding.
+    """
+    if isinstance(value, (int, float)):
+        return value  # If it's already a valid number, return as-is
+
+    if isinstance(value, str):
+        value = value.strip().replace(" ", "")
+
+        # Ensure it follows the correct format (detect negative and decimal)
+        match = re.search(r"-?\d+\.\d+", value)
+        if match:
+            return float(match.group())  # Convert to float while preserving precision
+
+    return None
+
+def read_coordinates(file_path: str) -> List[float | int]:
+    """
+    Reads latitude and longitude coordinates from a CSV or Excel (.xlsx) file.
+    Supports formats with BREAK lines and standard telemetry headers.
+    """
+    coordinates = []
+
+    try:
+        if is_track_file(file_path):
+            _, latitudes, longitudes = read_track_file(file_path)
+            coordinates = list(zip(latitudes.tolist(), longitudes.tolist()))
+
+        elif file_path.lower().endswith(".xlsx"):
+            _, latitudes, longitudes = read_xlsx(file_path)
+            coordinates = list(zip(latitudes.tolist(), longitudes.tolist()))
+
+        elif file_path.lower().endswith(".csv"):
+            # Only segments under a Time header hold telemetry rows
+            _, latitudes, longitudes = read_csv_columns(file_path, timed_only=True)
+            coordinates = list(zip(latitudes.tolist(), longitudes.tolist()))
+    except Exception as e:
+        print(f"Error reading file {file_path}: {e}")
+
+    return coordinates
+
+def parse_csv_rows(lines, headers):
+    """
+    Row-by-row fallback for segments the bulk parser rejects (blank or malformed rows).
+    :return: (times, latitudes, longitudes) arrays, NaN times if the header has no Time column.
+    """
+    points = []
+    lat_idx, lon_idx = headers.index("Latitude"), headers.index("Longitude")
+    time_idx = headers.index("Time") if "Time" in headers else None
+    for row in csv.reader(lines):
+        try:
+            latitude = clean_coordinate(row[lat_idx])
+            longitude = clean_coordinate(row[lon_idx])
+            time = parse_time(row[time_idx]) if time_idx is not None else None
+        except IndexError:
+            continue
+        if latitude is None or longitude is None:
+            continue
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            points.append((np.nan if time is None else time, latitude, longitude))
+    points = np.array(points, dtype=np.float64).reshape(-1, 3)
+    return points[:, 0].copy(), points[:, 1].copy(), points[:, 2].copy()
+
+def parse_csv_segment(text: str, headers):
+    """
+    Parses the data rows under one header in bulk.
+    MM:SS times lose their colons, which is lossless while every clock field after the first has
+    two digits, so "12:34.5" parses as the single number 1234.5 and is split again with divmod.
+    The block is parsed by NumPy's C reader (np.loadtxt) in a single call into a (rows, width)
+    array, then range-checked with masks. Segments whose rows do not all have the same shape go
+    through parse_csv_rows().
+    :return: (times, latitudes, longitudes) arrays, NaN times if the header has no Time column.
+    """
+    if text.isspace() or not text:
+        empty = np.empty(0, dtype=np.float64)
+        return empty, empty, empty
+    if text[0].isspace():
+        text = text.lstrip()
+
+    lat_idx, lon_idx = headers.index("Latitude"), headers.index("Longitude")
+    time_idx = headers.index("Time") if "Time" in headers else None
+
+    # Row shape from the first row, every other row must match it
+    fields = text.split("\n", 1)[0].split(",")
+    time_parts = fields[time_idx].count(":") + 1 if time_idx is not None and time_idx < len(fields) else 1
+
+    values = None
+    lines = (text.replace(":", "") if time_parts > 1 else text).splitlines()
+    while lines and not lines[-1].strip():
+        lines.pop()
+    if time_parts == 1 or two_digit_clocks(text, len(lines) * (time_parts - 1)):
+        try:
+            # Rows with a different number of fields make loadtxt raise, blank rows are skipped
+            values = np.loadtxt(lines, dtype=np.float64, delimiter=",", comments=None, ndmin=2)
+        except ValueError:
+            values = None  # A field that is not a number
+    if values is None or values.shape != (len(lines), len(fields)):
+        return parse_csv_rows(text.splitlines(), headers)
+
+    latitudes, longitudes = values[:, lat_idx], values[:, lon_idx]
+    if time_idx is not None:
+        clock, parts = values[:, time_idx], []
+        for part in range(1, time_parts):
+            clock, field = np.divmod(clock, 100.0)
+            parts.append(field)
+        # Seconds are rounded back to the decimal that was written, then combined as in parse_time()
+        parts[:1] = [np.round(field, 9) for field in parts[:1]]
+        times = clock
+        for field in reversed(parts):
+            times = times * 60 + field
+    else:
+        times = np.full(len(values), np.nan)
+
+    valid = (np.abs(latitudes) <= 90) & (np.abs(longitudes) <= 180)  # False for NaN too
+    if valid.all():
+        return times, latitudes, longitudes
+    return times[valid], latitudes[valid], longitudes[valid]
+
+def two_digit_clocks(text: str, count: int) -> bool:
+    """
+    Whether the text has `count` colons and each is followed by exactly two digits, as in MM:SS.f
+    and HH:MM:SS.
+    """
+    data = np.frombuffer(text.encode(), dtype=np.uint8)
+    colons = np.flatnonzero(data == ord(":"))
+    if len(colons) != count or not count:
+        return len(colons) == count
+
+    if colons[-1] + 3 >= len(data):
+        data = np.append(data, np.frombuffer(b"\n\n\n", dtype=np.uint8))  # Clock at the very end
+
+    def digits(offset):
+        return (data[colons + offset] - ord("0")) <= 9  # Wraps around below "0"
+
+    return bool(digits(1).all() and digits(2).all() and not digits(3).any())
+
+def find_segment_lines(text: str):
+    """
+    (start, end) offsets of the BREAK lines and header rows in a block of CSV text, in order.
+    Found with plain substring searches, which are far cheaper than a per-line regex.
+    """
+    lines = set()
+    for keyword in ("Latitude", "BREAK"):
+        position = text.find(keyword)
+        while position != -1:
+            start = text.rfind("\n", 0, position) + 1
+            end = text.find("\n", position)
+            end = len(text) if end == -1 else end
+            if keyword != "BREAK" or start == position:
+                lines.add((start, end))
+            position = text.find(keyword, end)
+    return sorted(lines)
+
+def parse_csv_text(text: str, headers):
+    """
+    Splits complete lines of CSV text at BREAK lines and header rows and bulk-parses each run of
+    data rows with parse_csv_segment(). Rows before the first header are skipped.
+    :param headers: Header active at the start of the text, [] if none has been seen yet.
+    :return: (list of (headers, (times, latitudes, longitudes)), header active at the end of the text)
+    """
+    segments = []
+    position = 0
+    for start, end in find_segment_lines(text):
+        if headers and start > position:
+            segments.append((headers, parse_csv_segment(text[position:start], headers)))
+        fields = [field.strip() for field in text[start:end].split(",")]
+        if "Latitude" in fields and "Longitude" in fields:
+            headers = fields
+        position = end
+    if headers and position < len(text):
+        segments.append((headers, parse_csv_segment(text[position:], headers)))
+    return segments, headers
+
+def iter_csv_segments(file_path: str, block_size: int = CSV_BLOCK_SIZE):
+    """
+    Reads a telemetry CSV in large blocks and yields (headers, (times, latitudes, longitudes))
+    for each run of data rows, split at BREAK lines and repeated header rows. Rows before the
+    first header are skipped.
+    """
+    headers = []
+    carry = ""  # Unterminated last line of the previous block
+    with open(file_path, mode='r', newline='', encoding='utf-8-sig') as file:
+        while True:
+            block = file.read(block_size)
+            text = carry + block
+            if block:
+                cut = text.rfind("\n") + 1
+                text, carry = text[:cut], text[cut:]
+            else:
+                carry = ""
+            if not text:
+                if not block:
+                    return
+                continue
+
+            segments, headers = parse_csv_text(text, headers)
+            yield from segments
+
+            if not block:
+                return
+
+def read_csv_columns(file_path: str, timed_only: bool = False):
+    """
+    Bulk-parses a telemetry CSV, see iter_csv_segments().
+    :param timed_only: Only keep segments under a header with a Time column.
+    :return: (times, latitudes, longitudes) float64 arrays, NaN where a row has no time.
+    """
+    parts = [columns for headers, columns in iter_csv_segments(file_path) if not timed_only or "Time" in headers]
+    if not parts:
+        empty = np.empty(0, dtype=np.float64)
+        return empty, empty, empty
+    return tuple(np.concatenate(column) for column in zip(*parts))
+
+def fill_times(times, default_interval: float = 0.2):
+    """
+    Vectorized version of the timing rules in iter_track(): clock times that wrap past the hour
+    are unwrapped and missing (NaN) times are spaced `default_interval` after the previous point.
+    """
+    times = np.array(times, dtype=np.float64)
+    valid = ~np.isnan(times)
+    if valid.all():
+        # Timed tracks only need unwrapping
+        if len(times) > 1:
+            wraps = np.diff(times) < -1800
+            if wraps.any():
+                times[1:] += np.cumsum(wraps) * 3600.0
+        return times
+
+    recorded = times[valid]
+    if len(recorded) > 1:
+        times[valid] = recorded + np.concatenate(([0.0], np.cumsum(np.diff(recorded) < -1800) * 3600.0))
+
+    index = np.arange(len(times))
+    last = np.maximum.accumulate(np.where(valid, index, -1)) if len(times) else index
+    base = np.where(last >= 0, times[np.maximum(last, 0)], -default_interval) if len(times) else times
+    return np.where(valid, times, base + (index - last) * default_interval)
+
+def find_xlsx_columns(row):
+    """
+    Finds the (time, latitude, longitude) column indexes in a spreadsheet header row.
+    The time index is None if there is no Time column. Old exports put "Latitude,Longitude" in a
+    single cell, that is returned as ("combined", index). Returns None if the row is not a header.
+    """
+    names = [str(value).strip().lower() if value is not None else "" for value in row]
+    if "latitude" in names and "longitude" in names:
+        return (names.index("time") if "time" in names else None, names.index("latitude"), names.index("longitude"))
+    if "latitude,longitude" in names:
+        return ("combined", names.index("latitude,longitude"))
+    return None
+
+def split_combined(value):
+    """
+    Splits an old single-cell "lat,lon" export value. Those files also replaced the decimal
+    points with commas, so "39,01904500,-104,89430100" has four parts.
+    """
+    if not isinstance(value, str):
+        return None, None
+    parts = value.replace(" ", "").split(",")
+    if len(parts) == 4:
+        parts = [f"{parts[0]}.{parts[1]}", f"{parts[2]}.{parts[3]}"]
+    if len(parts) != 2:
+        return None, None
+    return clean_coordinate(parts[0]), clean_coordinate(parts[1])
+
+def iter_xlsx_chunks(file_path: str, chunk_rows: int = 65536, header_rows: int = 20):
+    """
+    Streams a workbook's first sheet in read-only mode and yields (N, 3) float64 arrays of
+    (time, latitude, longitude), with NaN times when the sheet has no Time column.
+    The header is looked for once in the first `header_rows` rows; without one the latitude and
+    longitude are assumed to be in the second and third columns, as in older files.
+    """
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        columns = None
+        skipped = []
+        for row in rows:
+            columns = find_xlsx_columns(row)
+            if columns is not None:
+                break
+            skipped.append(row)
+            if len(skipped) >= header_rows:
+                break
+        if columns is None:
+            columns = (None, 1, 2)
+            rows = (row for chunk in (skipped, rows) for row in chunk)
+
+        chunk = []
+        for row in rows:
+            if not row:
+                continue
+            try:
+                if columns[0] == "combined":
+                    time = None
+                    latitude, longitude = split_combined(row[columns[1]])
+                else:
+                    time = parse_time(row[columns[0]]) if columns[0] is not None else None
+                    latitude = clean_coordinate(row[columns[1]])
+                    longitude = clean_coordinate(row[columns[2]])
+            except IndexError:
+                continue
+            if latitude is None or longitude is None:
+                continue
+            if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+                chunk.append((np.nan if time is None else time, latitude, longitude))
+                if len(chunk) >= chunk_rows:
+                    yield np.array(chunk, dtype=np.float64)
+                    chunk = []
+        if chunk:
+            yield np.array(chunk, dtype=np.float64)
+    finally:
+        workbook.close()
+
+def read_xlsx(file_path: str):
+    """
+    Reads an Excel track as (times, latitudes, longitudes) read-only float64 arrays, see iter_xlsx_chunks().
+    Results are cached until the file's mtime or size changes.
+    """
+    stat = os.stat(file_path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = xlsx_cache.get(file_path)
+    if cached is not None and cached[0] == key:
+        xlsx_cache.move_to_end(file_path)
+        return cached[1]
+
+    chunks = list(iter_xlsx_chunks(file_path))
+    points = np.concatenate(chunks) if chunks else np.empty((0, 3), dtype=np.float64)
+    points.flags.writeable = False
+    columns = (points[:, 0], points[:, 1], points[:, 2])
+
+    xlsx_cache[file_path] = (key, columns)
+    while len(xlsx_cache) > XLSX_CACHE_SIZE:
+        xlsx_cache.popitem(last=False)
+    return columns
+
+def parse_time(value):
+    """
+    Converts a telemetry Time field to seconds. Accepts plain seconds as well as
+    "MM:SS.f" and "HH:MM:SS.f" clock values. Returns None if it cannot be parsed.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime.time):
+        # Spreadsheet cells formatted as times
+        return value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1e6
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if not isinstance(value, str):
+        return None
+    seconds = 0.0
+    try:
+        for part in value.strip().split(":"):
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        return None
+    return seconds
+
+def iter_track(file_path: str, default_interval: float = 0.2):
+    """
+    Lazily yields (time, latitude, longitude) for each point of a track file, oldest first.
+    Accepts "Time,Latitude,Longitude" and plain "Latitude,Longitude" files (with BREAK lines and
+    repeated headers). Rows without a time are spaced `default_interval` seconds after the previous
+    one, and clock times that wrap past the hour are unwrapped so times never run backwards by more
+    than half an hour.
+    """
+    previous = -default_interval
+    offset = 0.0  # Hours added for MM:SS clocks that rolled over
+
+    def timed(time, latitude, longitude):
+        nonlocal previous, offset
+        if time is None:
+            time = previous + default_interval
+        else:
+            time += offset
+            if time < previous - 1800:
+                offset += 3600.0
+                time += 3600.0
+        previous = time
+        return time, latitude, longitude
+
+    if is_track_file(file_path):
+        # Binary tracks are already timestamped, walk the mapped columns chunk by chunk
+        try:
+            track = TrackFile(file_path)
+        except (OSError, ValueError) as e:
+            print(f"Error reading file {file_path}: {e}")
+            return
+        for _, _, views in track.chunks:
+            yield from zip(views["time"].tolist(), views["latitude"].tolist(), views["longitude"].tolist())
+        return
+
+    if file_path.lower().endswith(".xlsx"):
+        try:
+            times, latitudes, longitudes = read_xlsx(file_path)
+        except Exception as e:
+            print(f"Error reading file {file_path}: {e}")
+            return
+        for time, latitude, longitude in zip(times.tolist(), latitudes.tolist(), longitudes.tolist()):
+            yield timed(None if time != time else time, latitude, longitude)  # NaN marks a missing time
+        return
+
+    if not file_path.lower().endswith(".csv"):
+        return
+
+    try:
+        for _, (times, latitudes, longitudes) in iter_csv_segments(file_path):
+            for time, latitude, longitude in zip(times.tolist(), latitudes.tolist(), longitudes.tolist()):
+                yield timed(None if time != time else time, latitude, longitude)
+    except Exception as e:
+        print(f"Error reading file {file_path}: {e}")
+
+def read_track(file_path: str, default_interval: float = 0.2):
+    """
+    Reads a whole track with timestamps for replay, see iter_track().
+    :return: (times, latitudes, longitudes) float64 NumPy arrays. Binary tracks are memory-mapped, not copied.
+    """
+    try:
+        if is_track_file(file_path):
+            return read_track_file(file_path)
+        if file_path.lower().endswith(".csv"):
+            times, latitudes, longitudes = read_csv_columns(file_path)
+            return fill_times(times, default_interval), latitudes, longitudes
+        if file_path.lower().endswith(".xlsx"):
+            times, latitudes, longitudes = read_xlsx(file_path)
+            return fill_times(times, default_interval), latitudes.copy(), longitudes.copy()
+    except Exception as e:
+        print(f"Error reading file {file_path}: {e}")
+    empty = np.empty(0, dtype=np.float64)
+    return empty, empty, empty
+
+def last_time(file_path: str, default_interval: float = 0.2, tail_bytes: int = 4096):
+    """
+    Finds a track's final time, unwrapped past the hour as in iter_track().
+    HH:MM:SS and plain-seconds stamps are read from the last rows of the file without reading all
+    of it. MM:SS clocks may have rolled over any number of times before those rows, so such files
+    (and clocks that ran past midnight) have their time column read in full.
+    Returns None for CSV files without a Time column.
+    """
+    if is_track_file(file_path):
+        try:
+            return TrackFile(file_path).end
+        except (OSError, ValueError):
+            return None
+    if file_path.lower().endswith(".xlsx"):
+        times = read_track(file_path, default_interval)[0]
+        return float(times[-1]) if len(times) else None
+    try:
+        with open(file_path, mode='rb') as file:
+            head = file.read(tail_bytes).decode('utf-8', errors='replace').splitlines()
+            file.seek(0, os.SEEK_END)
+            file.seek(max(file.tell() - tail_bytes, 0))
+            lines = file.read().decode('utf-8', errors='replace').splitlines()
+    except OSError:
+        return None
+
+    def stamps(rows):
+        for row in csv.reader(rows):
+            if len(row) >= 3:
+                time = parse_time(row[0])
+                if time is not None and clean_coordinate(row[1]) is not None:
+                    yield row[0], time
+
+    last = next(stamps(reversed(lines[1:] or lines)), None)
+    if last is None:
+        return None
+    first = next(stamps(head), last)
+    if last[0].count(":") != 1 and last[1] >= first[1] - 1800:
+        return last[1]
+    # The clock wrapped somewhere, only the whole time column says how often
+    times = read_track(file_path, default_interval)[0]
+    return float(times[-1]) if len(times) else last[1]
+
+class CoordinateTail:
+    """
+    Incrementally reads a telemetry CSV that is being appended to.
+    Remembers the byte offset, the active header and the points parsed so far, so each
+    call to read() only parses the bytes written since the previous call.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets everything read so far. The next read() starts from the top of the file.
+        A fresh list is created so callers still holding the old one are not affected.
+        """
+        self.coordinates: List[Tuple[float, float]] = []
+        self.headers = []
+        self.offset = 0
+        self.inode = None
+        self.partial = b""  # Trailing bytes of a line that has not been terminated yet
+
+    def read(self) -> List[Tuple[float, float]]:
+        """
+        Parses newly appended rows and returns the cumulative coordinate list.
+        The returned list is owned by the reader and is not copied.
+        """
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            # File missing (e.g. mid-rotation), start over when it reappears
+            if self.offset:
+                self.reset()
+            return self.coordinates
+
+        # Replaced or truncated file, re-read from the beginning
+        if (self.inode is not None and stat.st_ino != self.inode) or stat.st_size < self.offset:
+            self.reset()
+        self.inode = stat.st_ino
+
+        if stat.st_size == self.offset:
+            return self.coordinates
+
+        try:
+            with open(self.file_path, mode='rb') as file:
+                file.seek(self.offset)
+                data = file.read()
+        except OSError as e:
+            print(f"Error reading file {self.file_path}: {e}")
+            return self.coordinates
+
+        start = self.offset - len(self.partial)  # File offset of the first byte parsed below
+        self.offset += len(data)
+        data = self.partial + data
+        cut = data.rfind(b"\n") + 1
+        self.partial = data[cut:]  # Keep the unterminated tail for the next call
+        text = data[:cut].decode('utf-8', errors='replace')
+        if not start:
+            text = text.removeprefix("\ufeff")
+
+        segments, self.headers = parse_csv_text(text, self.headers)
+        for headers, (_, latitudes, longitudes) in segments:
+            # Only segments under a Time header hold telemetry rows, as in read_coordinates()
+            if "Time" in headers:
+                self.coordinates.extend(zip(latitudes.tolist(), longitudes.tolist()))
+
+        return self.coordinates
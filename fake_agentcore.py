@@ -0,0 +1,141 @@
+import os, sys, math, time, socket, argparse, threading
+import numpy as np
+from ac_protocol import encode_frame, encode_json, encode_batch, HANDSHAKE_BINARY, MAX_BATCH
+from telemetry import RECORD
+
+SOCKET = "/tmp/ac_bridge"
+
+class FakeAgentCore:
+    """
+    Local stand-in for the AgentCore bridge server, used for tests and benchmarks.
+    Listens on a UNIX socket, waits for the client's handshake byte and then streams
+    framed `[dVals[5], rVals[5], timestamp, mode]` samples at a fixed rate, as JSON or, when the
+    client asks for it, as binary batches holding every sample that fell due together.
+    """
+
+    def __init__(self, path: str = SOCKET, rate: float = 1000.0, count: int = None, center=(39.0182, -104.8932), binary: bool = True,
+                 burst: int = 1):
+        """
+        :param path: UNIX socket path to listen on.
+        :param rate: Samples per second, 0 sends as fast as possible.
+        :param count: Number of samples to send before closing, None streams forever.
+        :param center: (latitude, longitude) the simulated drones circle around.
+        :param binary: Honour the binary handshake, False to behave like a JSON-only server.
+        :param burst: Samples sent together when unthrottled.
+        """
+        self.path = path
+        self.rate = rate
+        self.count = count
+        self.center = center
+        self.binary = binary
+        self.burst = burst
+        self.sent = 0
+        self.handshake = None
+        self.running = False
+        self.thread = None
+
+        if os.path.exists(path):
+            os.remove(path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(path)
+        self.server.listen(1)
+
+    def sample(self, i: int):
+        """
+        Builds sample number i: both drones circle the center, the rogue one twice as fast.
+        """
+        lat, lon = self.center
+        angle = i * 0.001
+        disco = [lat + 4e-4 * math.sin(angle), lon + 5e-4 * math.cos(angle), 30.0, math.degrees(angle) % 360, 5.0]
+        rogue = [lat + 3e-4 * math.sin(2 * angle), lon + 4e-4 * math.cos(2 * angle), 40.0, math.degrees(2 * angle) % 360, 10.0]
+        return [disco, rogue, time.time(), 1]
+
+    def encode(self, messages) -> bytes:
+        """
+        Frames a list of samples: one binary batch per MAX_BATCH samples after a binary handshake, one JSON frame each otherwise.
+        """
+        if not (self.binary and self.handshake == HANDSHAKE_BINARY):
+            return b"".join(encode_frame(encode_json(message)) for message in messages)
+        records = np.empty(len(messages), dtype=RECORD)
+        records["disco"] = [message[0] for message in messages]
+        records["rogue"] = [message[1] for message in messages]
+        records["timestamp"] = [message[2] for message in messages]
+        records["mode"] = [message[3] for message in messages]
+        return b"".join(encode_frame(encode_batch(records[start:start + MAX_BATCH]))
+                        for start in range(0, len(records), MAX_BATCH))
+
+    def stream(self, conn: socket.socket):
+        """
+        Sends samples until `count` is reached or stop() is called.
+        Samples that fall due together are written with a single sendall.
+        """
+        started = time.monotonic()
+        while self.running and (self.count is None or self.sent < self.count):
+            due = self.sent + self.burst if self.rate <= 0 else int((time.monotonic() - started) * self.rate) + 1
+            if self.count is not None:
+                due = min(due, self.count)
+            if due <= self.sent:
+                time.sleep(min(0.001, 1.0 / self.rate))
+                continue
+            conn.sendall(self.encode([self.sample(i) for i in range(self.sent, due)]))
+            self.sent = due
+
+    def serve(self):
+        """
+        Accepts one client, reads its handshake byte and streams samples to it.
+        """
+        self.running = True
+        try:
+            conn, _ = self.server.accept()
+        except OSError:
+            return  # Stopped before a client connected
+        try:
+            self.handshake = conn.recv(1)
+            self.stream(conn)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            conn.close()
+
+    def start(self):
+        """
+        Serves in a background thread and returns immediately.
+        """
+        self.running = True
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        try:
+            self.server.shutdown(socket.SHUT_RDWR)  # Wakes a serve() still blocked in accept()
+        except OSError:
+            pass
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+        self.server.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stand-in AgentCore bridge server")
+    parser.add_argument("--path", default=SOCKET, help="UNIX socket path")
+    parser.add_argument("--rate", type=float, default=1000.0, help="samples per second, 0 for unthrottled")
+    parser.add_argument("--count", type=int, default=None, help="stop after this many samples")
+    parser.add_argument("--burst", type=int, default=1, help="samples sent together when unthrottled")
+    parser.add_argument("--json-only", action="store_true", help="ignore the binary handshake and always send JSON")
+    args = parser.parse_args(argv)
+
+    server = FakeAgentCore(args.path, args.rate, args.count, binary=not args.json_only, burst=args.burst)
+    print(f"Fake AgentCore listening on {args.path} at {args.rate} Hz")
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        print("Exiting")
+    finally:
+        server.stop()
+    print(f"Sent {server.sent} samples")
+
+if __name__ == "__main__":
+    sys.exit(main())
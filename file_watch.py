@@ -0,0 +1,97 @@
+import os, time
+from gi.repository import Gio, GLib
+
+# File monitor events that can mean new bytes were written
+CHANGE_EVENTS = {
+    Gio.FileMonitorEvent.CHANGED,
+    Gio.FileMonitorEvent.CHANGES_DONE_HINT,
+    Gio.FileMonitorEvent.CREATED,
+    Gio.FileMonitorEvent.MOVED_IN,
+    Gio.FileMonitorEvent.RENAMED,
+}
+
+class FileWatcher:
+    """
+    Watches a set of files from the GLib main loop and calls back when any of them changes.
+    Uses Gio.FileMonitor (inotify on Linux) and falls back to polling os.stat() if a monitor
+    cannot be created. Bursts of changes are coalesced so the callback runs at most once per
+    `min_interval` seconds, with the list of paths that changed since the previous call.
+    """
+
+    def __init__(self, paths, callback, min_interval: float = 0.1, poll_interval: float = 0.5):
+        """
+        :param paths: Files to watch. They do not have to exist yet.
+        :param callback: Called on the main loop as callback(changed_paths).
+        :param min_interval: Minimum time in seconds between two callbacks.
+        :param poll_interval: Stat polling period in seconds for files without a monitor.
+        """
+        self.callback = callback
+        self.min_interval = min_interval
+        self.poll_interval = poll_interval
+        self.monitors = {}
+        self.polled = {}  # Path -> last (inode, size, mtime) for the stat fallback
+        self.changed = set()
+        self.last_flush = 0.0
+        self.flush_source = None
+        self.poll_source = None
+
+        for path in paths:
+            try:
+                monitor = Gio.File.new_for_path(path).monitor_file(Gio.FileMonitorFlags.WATCH_MOVES, None)
+                monitor.connect("changed", self.on_monitor_changed, path)
+                self.monitors[path] = monitor
+            except GLib.Error as e:
+                print(f"File monitor unavailable for {path}, polling instead: {e}")
+                self.polled[path] = self.stat(path)
+
+        if self.polled:
+            self.poll_source = GLib.timeout_add(int(self.poll_interval * 1000), self.poll)
+
+    @staticmethod
+    def stat(path):
+        try:
+            st = os.stat(path)
+            return (st.st_ino, st.st_size, st.st_mtime_ns)
+        except OSError:
+            return None
+
+    def on_monitor_changed(self, monitor, file, other_file, event, path):
+        if event in CHANGE_EVENTS:
+            self.mark_changed(path)
+
+    def poll(self):
+        for path, previous in self.polled.items():
+            current = self.stat(path)
+            if current != previous:
+                self.polled[path] = current
+                self.mark_changed(path)
+        return True  # Keep polling
+
+    def mark_changed(self, path):
+        """
+        Records a change and schedules a callback no sooner than min_interval after the last one.
+        """
+        self.changed.add(path)
+        if self.flush_source is not None:
+            return  # Already scheduled, this change rides along
+        delay = max(0.0, self.min_interval - (time.monotonic() - self.last_flush))
+        self.flush_source = GLib.timeout_add(int(delay * 1000), self.flush)
+
+    def flush(self):
+        self.flush_source = None
+        self.last_flush = time.monotonic()
+        changed, self.changed = self.changed, set()
+        try:
+            self.callback(sorted(changed))
+        except Exception as e:
+            print(f"Error in file watcher callback: {e}")
+        return False  # One-shot
+
+    def stop(self):
+        for monitor in self.monitors.values():
+            monitor.cancel()
+        self.monitors.clear()
+        for source in (self.flush_source, self.poll_source):
+            if source is not None:
+                GLib.source_remove(source)
+        self.flush_source = self.poll_source = None
@@ -0,0 +1,184 @@
+import os, json, time, socket, contextlib
+import numpy as np
+from collections import deque
+
+# Pipeline stages in data-flow order, each with its own duration histogram
+STAGES = ("receive", "decode", "getVals", "parse", "project", "rasterize", "texture", "present")
+LATENCY = "glass_to_glass"  # Sender timestamp of the newest sample -> frame handed to GTK
+PERCENTILES = (50, 90, 99)
+
+class LatencyHistogram:
+    """
+    Fixed-memory log-linear histogram of durations, in the style of HdrHistogram.
+    Values are counted in microseconds: exactly below 2**significant_bits, then in buckets whose width
+    doubles with every power of two, so every recorded value is kept to within 1 / 2**(significant_bits - 1)
+    of its true value from a microsecond up to `max_seconds`, in a few hundred counters.
+    Each histogram expects a single writer thread.
+    """
+
+    def __init__(self, max_seconds: float = 3600.0, significant_bits: int = 5):
+        self.sub_buckets = 1 << significant_bits
+        self.half = self.sub_buckets // 2
+        self.max_value = int(max_seconds * 1e6)
+        self.counts = [0] * (self.index(self.max_value) + 1)
+        self.total = 0
+        self.sum = 0
+        self.max = 0
+
+    def index(self, value: int) -> int:
+        if value < self.sub_buckets:
+            return value
+        shift = value.bit_length() - self.half.bit_length()
+        return shift * self.half + (value >> shift)
+
+    def bucket_value(self, index: int) -> float:
+        """
+        Middle of a bucket, in microseconds.
+        """
+        if index < self.sub_buckets:
+            return float(index)
+        shift = index // self.half - 1
+        return ((index - shift * self.half) + 0.5) * (1 << shift)
+
+    def record(self, seconds: float):
+        value = min(max(int(seconds * 1e6), 0), self.max_value)
+        self.counts[self.index(value)] += 1
+        self.total += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.total = self.sum = self.max = 0
+
+    def percentile(self, percent: float) -> float:
+        """
+        Value in seconds that `percent` of the recorded values are at or below, 0 when empty.
+        """
+        if not self.total:
+            return 0.0
+        rank = max(1, int(np.ceil(percent / 100 * self.total)))
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(self.bucket_value(index), self.max) / 1e6
+
+    def summary(self) -> dict:
+        """
+        Count and mean/max/percentiles in milliseconds.
+        """
+        summary = {"count": self.total, "mean_ms": round(self.sum / self.total / 1e3, 3) if self.total else 0.0,
+                   "max_ms": round(self.max / 1e3, 3)}
+        for percent in PERCENTILES:
+            summary[f"p{percent}_ms"] = round(self.percentile(percent) * 1e3, 3)
+        return summary
+
+class StageTimer:
+    """
+    Context manager adding the monotonic duration of its block to a histogram.
+    """
+
+    def __init__(self, histogram: LatencyHistogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.record(time.perf_counter() - self.started)
+
+NO_TIMER = contextlib.nullcontext()  # Shared do-nothing stage while disabled
+
+class Metrics:
+    """
+    Per-stage timings, frame rate and glass-to-glass latency of the live map pipeline.
+    Disabled by default: stage() then returns one shared no-op context manager and the other
+    recording calls return straight away, so the instrumented code pays a method call per batch or frame.
+    Stage durations use time.perf_counter(). Glass-to-glass latency compares time.time() against
+    the sender's wall-clock timestamp, so it assumes the AgentCore host clock is in sync.
+    """
+
+    def __init__(self, fps_window: int = 120):
+        self.enabled = False
+        self.histograms = {name: LatencyHistogram() for name in STAGES + (LATENCY,)}
+        self.frame_times = deque(maxlen=fps_window)  # Monotonic present times of the latest frames
+        self.started = time.monotonic()
+        self.export_socket = None
+
+    def enable(self, enabled: bool = True):
+        self.enabled = enabled
+
+    def reset(self):
+        for histogram in self.histograms.values():
+            histogram.reset()
+        self.frame_times.clear()
+        self.started = time.monotonic()
+
+    def stage(self, name: str):
+        """
+        Times a `with` block as one run of a pipeline stage.
+        """
+        if not self.enabled:
+            return NO_TIMER
+        return StageTimer(self.histograms[name])
+
+    def record(self, name: str, seconds: float):
+        if self.enabled:
+            self.histograms[name].record(seconds)
+
+    def frame_presented(self, sample_time: float = None):
+        """
+        Counts a frame shown on screen.
+        :param sample_time: Sender timestamp (time.time() seconds) of the newest sample in the frame, if known.
+        """
+        if not self.enabled:
+            return
+        self.frame_times.append(time.monotonic())
+        if sample_time:
+            self.histograms[LATENCY].record(time.time() - sample_time)
+
+    def fps(self) -> float:
+        if len(self.frame_times) < 2:
+            return 0.0
+        elapsed = self.frame_times[-1] - self.frame_times[0]
+        return (len(self.frame_times) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "time": time.time(),
+            "uptime": round(time.monotonic() - self.started, 3),
+            "fps": round(self.fps(), 2),
+            "stages": {name: self.histograms[name].summary() for name in STAGES},
+            LATENCY: self.histograms[LATENCY].summary(),
+        }
+
+    def hud_text(self) -> str:
+        latency = self.histograms[LATENCY]
+        lines = [f"{self.fps():5.1f} FPS"]
+        if latency.total:
+            lines.append(f"latency p50 {latency.percentile(50) * 1e3:.0f} ms  p99 {latency.percentile(99) * 1e3:.0f} ms")
+        for name in ("parse", "rasterize", "texture"):
+            histogram = self.histograms[name]
+            if histogram.total:
+                lines.append(f"{name} p99 {histogram.percentile(99) * 1e3:.1f} ms")
+        return "\n".join(lines)
+
+    def export(self, target: str):
+        """
+        Writes a snapshot as JSON to a file, replaced atomically so readers never see half of it,
+        or sends it as one datagram to "udp://host:port".
+        """
+        data = json.dumps(self.snapshot())
+        try:
+            if target.startswith("udp://"):
+                host, port = target[len("udp://"):].rsplit(":", 1)
+                if self.export_socket is None:
+                    self.export_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self.export_socket.sendto(data.encode(), (host, int(port)))
+            else:
+                with open(target + ".tmp", "w", encoding="utf-8") as file:
+                    file.write(data)
+                os.replace(target + ".tmp", target)
+        except (OSError, ValueError) as e:
+            print(f"Error exporting metrics to {target}: {e}")
+
+metrics = Metrics()
@@ -0,0 +1,244 @@
+import numpy as np
+
+ZOOM_LEVELS = (0.125, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0)  # Screen pixels per map pixel, up to tiles.MAX_ZOOM
+
+def zoom_level(zoom: float, levels=ZOOM_LEVELS) -> int:
+    """
+    Index of the coarsest level with at least `zoom`'s detail, the finest one past the end.
+    """
+    for index, level in enumerate(levels):
+        if level >= zoom:
+            return index
+    return len(levels) - 1
+
+def distinct_pixels(points, last=None, resolution: float = 1.0):
+    """
+    Marks the points that land on a different pixel than the point before them.
+    Consecutive samples are often far less than a pixel apart, and a dot drawn again on the
+    same pixel changes nothing, so only the marked points need drawing.
+    :param points: (N, 2) pixel coordinates.
+    :param last: Pixel cell of the point before the batch, from a previous call.
+    :param resolution: Pixel size in the units of `points`, e.g. 0.5 when drawing at 2x zoom.
+    :return: (mask, cell of the last point) to pass as `last` with the next batch.
+    """
+    cells = np.floor(np.asarray(points, dtype=np.float64).reshape(-1, 2) / resolution).astype(np.int64)
+    if not len(cells):
+        return np.zeros(0, dtype=bool), last
+    previous = np.empty_like(cells)
+    previous[1:] = cells[:-1]
+    previous[0] = last if last is not None else cells[0] - 1
+    return (cells != previous).any(axis=1), cells[-1]
+
+def douglas_peucker(points, tolerance: float, step: int = None):
+    """
+    Douglas-Peucker polyline simplification.
+    Every interval at the same depth of the recursion is split in one vectorized pass, so the
+    number of Python-level steps follows the depth of the recursion, not the number of vertices.
+    :param points: (N, 2) polyline vertices.
+    :param tolerance: Largest distance a dropped vertex may be from the simplified line.
+    :param step: Simplify independent runs of `step` segments instead of the whole line, which
+                 bounds the worst case. Every step-th vertex is kept.
+    :return: Sorted indexes of the vertices to keep, always including the first and last.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    count = len(points)
+    if count < 3:
+        return np.arange(count)
+
+    keep = np.zeros(count, dtype=bool)
+    breaks = np.append(np.arange(0, count - 1, step or count - 1), count - 1)
+    keep[breaks] = True
+    firsts, lasts = breaks[:-1], breaks[1:]
+    wide = lasts - firsts >= 2
+    firsts, lasts = firsts[wide], lasts[wide]
+    while len(firsts):
+        # Interior points of every interval, back to back, and the interval each belongs to
+        sizes = lasts - firsts - 1
+        bounds = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        owner = np.repeat(np.arange(len(firsts)), sizes)
+        index = np.arange(len(owner)) - bounds[owner] + firsts[owner] + 1
+
+        start = points[firsts][owner]
+        direction = points[lasts][owner] - start
+        offsets = points[index] - start
+        length = np.hypot(direction[:, 0], direction[:, 1])
+        cross = np.abs(direction[:, 0] * offsets[:, 1] - direction[:, 1] * offsets[:, 0])
+        distances = np.where(length > 0, cross / np.where(length > 0, length, 1.0),
+                             np.hypot(offsets[:, 0], offsets[:, 1]))
+
+        # Farthest point of each interval, the first one on ties
+        farthest = np.maximum.reduceat(distances, bounds)
+        hits = np.flatnonzero(distances == farthest[owner])
+        hits = hits[np.concatenate(([True], owner[hits[1:]] != owner[hits[:-1]]))]
+        split = farthest > tolerance
+        middles = index[hits][split]
+        keep[middles] = True
+
+        firsts = np.concatenate((firsts[split], middles))
+        lasts = np.concatenate((middles, lasts[split]))
+        wide = lasts - firsts >= 2
+        firsts, lasts = firsts[wide], lasts[wide]
+    return np.flatnonzero(keep)
+
+def simplify(points, tolerance: float = 0.5, resolution: float = 1.0, batch: int = 4096):
+    """
+    Level of detail for a whole, already known track.
+    :return: (distinct, vertices) boolean masks over `points`: the points worth a dot (see
+             distinct_pixels()) and the vertices of the simplified trail line. Douglas-Peucker runs
+             on `batch`-sized runs of distinct points to bound its worst case.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    distinct, _ = distinct_pixels(points, resolution=resolution)
+    vertices = np.zeros(len(points), dtype=bool)
+    indexes = np.flatnonzero(distinct)
+    vertices[indexes[douglas_peucker(points[indexes], tolerance, batch - 1)]] = True
+    if len(points):
+        vertices[-1] = True
+    return distinct, vertices
+
+class TrailLOD:
+    """
+    Incrementally simplified trail for one track at one zoom level.
+    Points are pixel-deduplicated as they arrive and collected in a tail. Once the tail holds
+    `batch` points it is simplified with Douglas-Peucker and the kept vertices are handed out
+    once, the last one also anchoring the next tail. Work per point stays constant and
+    the simplified line grows with the trail's on-screen complexity, not with its sample count.
+    Only the tail is kept, callers store the pieces they need.
+    """
+
+    def __init__(self, tolerance: float = 0.5, resolution: float = 1.0, batch: int = 256):
+        """
+        :param tolerance: Simplification tolerance, in the units of the points.
+        :param resolution: Pixel size for deduplication, in the units of the points.
+        :param batch: Tail length that triggers a simplification pass.
+        """
+        self.tolerance = tolerance
+        self.resolution = resolution
+        self.batch = batch
+        self.reset()
+
+    def reset(self):
+        self.vertices = 0  # Vertices of the simplified line handed out so far
+        self.tail = np.empty((0, 2))  # Distinct points not simplified yet, tail[0] is the anchor
+        self.last_cell = None
+        self.samples = 0
+
+    def __len__(self):
+        # The tail starts at the last vertex handed out
+        return self.vertices + len(self.tail) - (1 if self.vertices and len(self.tail) else 0)
+
+    def extend(self, points):
+        """
+        Adds new trail points.
+        :return: (distinct, committed): the new points that landed on a new pixel, and the piece of
+                 simplified line committed by this call (empty if none), to be drawn once.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.samples += len(points)
+        mask, self.last_cell = distinct_pixels(points, self.last_cell, self.resolution)
+        distinct = points[mask]
+        self.tail = np.concatenate((self.tail, distinct))
+
+        if len(self.tail) < self.batch:
+            return distinct, np.empty((0, 2))
+        # Only whole runs of `batch` points, a large batch is simplified as several of them
+        return distinct, self.flush(1 + (len(self.tail) - 1) // (self.batch - 1) * (self.batch - 1))
+
+    def flush(self, count: int = None):
+        """
+        Simplifies and commits the tail now, e.g. once the track has ended. extend() calls it
+        whenever the tail is full, flushing more often only makes the pieces shorter.
+        :param count: Only commit the first `count` points of the tail.
+        :return: The committed piece of line, see extend().
+        """
+        run = self.tail[:count]
+        if len(run) < 2:
+            return np.empty((0, 2))
+        piece = run[douglas_peucker(run, self.tolerance, self.batch - 1)]
+        self.vertices += len(piece) - (1 if self.vertices else 0)
+        self.tail = self.tail[len(run) - 1:]  # The last point is always kept and anchors the next piece
+        return piece
+
+class PointBuffer:
+    """
+    Growable (N, 2) float array with amortized O(1) appends.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.data = np.empty((capacity, 2))
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, points):
+        end = self.size + len(points)
+        if end > len(self.data):
+            data = np.empty((max(end, 2 * len(self.data)), 2))
+            data[:self.size] = self.data[:self.size]
+            self.data = data
+        self.data[self.size:end] = points
+        self.size = end
+
+    def view(self) -> np.ndarray:
+        return self.data[:self.size]
+
+class TrailLevels:
+    """
+    Level of detail for one track at several zoom levels, in map pixels.
+    Each level has its own TrailLOD, deduplicating dots at one screen pixel and simplifying the
+    line to half a screen pixel at that zoom, and keeps the dots and simplified line it produced.
+    A trail redrawn after a zoom or pan draws one level's dots and line, whose size follows
+    the trail's on-screen complexity at that zoom instead of its sample count.
+    """
+
+    def __init__(self, levels=ZOOM_LEVELS, tolerance: float = 0.5, batch: int = 256, store: bool = True):
+        """
+        :param levels: Zoom levels, screen pixels per map pixel.
+        :param tolerance: Simplification tolerance in screen pixels.
+        :param batch: Tail length that triggers a simplification pass.
+        :param store: Keep the dots and lines for redraws, a renderer that never redraws does not need them.
+        """
+        self.levels = tuple(levels)
+        self.lods = [TrailLOD(tolerance / zoom, 1.0 / zoom, batch) for zoom in self.levels]
+        self.store = store
+        self.stored_dots = [PointBuffer() for _ in self.levels]
+        self.stored_lines = [PointBuffer() for _ in self.levels]
+        self.last_dots = [None] * len(self.levels)
+
+    def level_for(self, zoom: float) -> int:
+        return zoom_level(zoom, self.levels)
+
+    def extend(self, points):
+        """
+        Adds new trail points, in map pixels.
+        :return: The new dots of every level, one (N, 2) array per level.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        new_dots = []
+        for level, lod in enumerate(self.lods):
+            distinct, piece = lod.extend(points)
+            if len(distinct):
+                self.last_dots[level] = distinct[-1]
+            if self.store:
+                self.stored_dots[level].append(distinct)
+                line = self.stored_lines[level]
+                line.append(piece[1:] if len(line) else piece)  # Pieces share their end points
+            new_dots.append(distinct)
+        return new_dots
+
+    def last_dot(self, level: int):
+        """
+        The newest dot of a level, where the next segment of line starts. None before the first.
+        """
+        return self.last_dots[level]
+
+    def dots(self, level: int) -> np.ndarray:
+        return self.stored_dots[level].view()
+
+    def line(self, level: int) -> np.ndarray:
+        """
+        The whole trail line of a level: the simplified pieces, then the tail not simplified yet.
+        """
+        line, tail = self.stored_lines[level].view(), self.lods[level].tail
+        return np.concatenate((line, tail[1:])) if len(line) else tail.copy()
@@ -0,0 +1,264 @@
+import numpy as np
+from PIL import Image, ImageDraw
+from lod import TrailLevels
+from instrumentation import metrics
+
+# Map corners (lat/lon): top-left, bottom-left, top-right
+MAP_CORNERS = (
+    (39.019045, -104.894301),
+    (39.017430, -104.894301),
+    (39.019045, -104.892113),
+)
+
+TRACK_COLORS = {"rogue": "red", "discovery": "green"}
+
+class MapProjection:
+    """
+    Lat/lon -> pixel transform for a georeferenced map image.
+    Built from the image size and the lat/lon of its top-left, bottom-left and top-right
+    corners. Whole coordinate arrays are projected in one vectorized call.
+    """
+
+    def __init__(self, width, height, corners=MAP_CORNERS):
+        self.width, self.height = width, height
+        self.corners = corners
+        (lat0, lon0), (lat_bl, lon_bl), (lat_tr, lon_tr) = corners
+        self.origin = (lat0, lon0)
+
+        # Linear part of the affine transform taking the corners to (0, height) and (width, 0),
+        # solved relative to the top-left corner to keep full float precision
+        offsets = np.array([[lat_bl - lat0, lon_bl - lon0], [lat_tr - lat0, lon_tr - lon0]])
+        pixels = np.array([[0.0, height], [width, 0.0]])
+        self.matrix = np.linalg.solve(offsets, pixels)
+
+    @classmethod
+    def for_image(cls, image_path, corners=MAP_CORNERS):
+        """
+        Builds the projection for an image file using its real size (the file is not decoded).
+        """
+        with Image.open(image_path) as image:
+            width, height = image.size
+        return cls(width, height, corners)
+
+    def transform(self, latitudes, longitudes):
+        """
+        Projects arrays of latitudes and longitudes to fractional map pixels, without rounding or bounds checks.
+        """
+        d_lat = np.asarray(latitudes, dtype=np.float64) - self.origin[0]
+        d_lon = np.asarray(longitudes, dtype=np.float64) - self.origin[1]
+        m = self.matrix
+        return d_lat * m[0, 0] + d_lon * m[1, 0], d_lat * m[0, 1] + d_lon * m[1, 1]
+
+    def project(self, latitudes, longitudes):
+        """
+        Projects arrays of latitudes and longitudes.
+        :return: (pixel_x, pixel_y, in_bounds) where the pixels are int64 arrays and in_bounds
+                 is a boolean mask of the points that land on the map.
+        """
+        x, y = self.transform(latitudes, longitudes)
+
+        in_bounds = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+        np.nan_to_num(x, copy=False, nan=-1.0, posinf=-1.0, neginf=-1.0)
+        np.nan_to_num(y, copy=False, nan=-1.0, posinf=-1.0, neginf=-1.0)
+        return x.astype(np.int64), y.astype(np.int64), in_bounds
+
+    def project_coordinates(self, coordinates):
+        """
+        Projects a sequence of (latitude, longitude) pairs or an (N, 2) array, see project().
+        """
+        points = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        return self.project(points[:, 0], points[:, 1])
+
+    def pixel(self, latitude, longitude):
+        """
+        Projects a single point without a bounds check.
+        """
+        d_lat, d_lon = latitude - self.origin[0], longitude - self.origin[1]
+        m = self.matrix
+        return int(d_lat * m[0, 0] + d_lon * m[1, 0]), int(d_lat * m[0, 1] + d_lon * m[1, 1])
+
+def frame_image(array):
+    """
+    Wraps an (H, W, 4) uint8 array in an RGBA PIL image that draws straight into the array.
+    """
+    height, width = array.shape[:2]
+    image = Image.frombuffer("RGBA", (width, height), array, "raw", "RGBA", 0, 1)
+    image.readonly = 0  # frombuffer maps the memory read-only, PIL would copy it on first draw
+    return image
+
+def track_origin(coordinates):
+    """
+    Returns (identity, absolute index of the first point) for a coordinate list or TrackSnapshot.
+    """
+    return getattr(coordinates, "source", coordinates), getattr(coordinates, "first", 0)
+
+class MapRenderer:
+    """
+    Layered map renderer.
+    The base map is decoded once. Trail points are drawn onto a persistent trail layer only
+    when they first arrive and land on a new pixel, joined by a line, and the drone icons form a small dynamic layer that is restored
+    and re-pasted in place, so frame cost does not grow with track length. Each track's level of
+    detail is kept in a lod.TrailLevels, for the zoom levels in `zoom_levels`.
+    """
+
+    warn_out_of_bounds = True  # Report points that fall off the map
+    zoom_levels = (1.0,)  # Zoom levels the trails are kept at, the map is drawn at its own size
+    redraws_trails = False  # Whether trails are ever redrawn from their TrailLevels
+
+    def __init__(self, base_map_path, icons, projection=None):
+        """
+        :param base_map_path: Path to the map image.
+        :param icons: Dict of track name -> RGBA PIL icon drawn at the latest point.
+        :param projection: MapProjection for the map, built from the image size if not given.
+        """
+        # RGBA so finished frames can be handed to Gdk.MemoryTexture without a format conversion
+        self.base = Image.open(base_map_path).convert("RGBA")
+        self.width, self.height = self.base.size
+        self.icons = icons
+        self.projection = projection or MapProjection(self.width, self.height)
+        self.map_projection = self.projection  # Lat/lon -> full resolution map pixels
+        self.zoom = 1.0
+        self.level = 0
+
+        # One reusable RGBA buffer that frames are drawn straight into
+        self.frame_buffer = np.empty((self.height, self.width, 4), dtype=np.uint8)
+        self.frame = frame_image(self.frame_buffer)
+
+        self.reset()
+
+    def reset(self):
+        """
+        Drops all drawn trails and starts again from the clean base map.
+        """
+        self.clear_layers()
+        self.sources = {}  # Track name -> list or store generation the trail was drawn from
+        self.firsts = {}  # Track name -> absolute index of the first point on the trail layer
+        self.drawn = {}  # Track name -> absolute index one past the last point on the trail layer
+        self.trails = {}  # Track name -> TrailLevels of the points drawn so far
+
+    def clear_layers(self):
+        """
+        Clears the trail layer and the frame back to the base map, keeping the tracks' trails.
+        """
+        self.trail = self.base.copy()  # Base map + every trail point drawn so far
+        self.frame.paste(self.base, (0, 0))  # Trail layer + drone icons, what gets displayed
+        self.trail_draw = ImageDraw.Draw(self.trail)
+        self.frame_draw = ImageDraw.Draw(self.frame)
+        self.icon_boxes = []  # Frame regions currently covered by icons
+
+    def to_screen(self, points) -> np.ndarray:
+        """
+        Map pixels -> integer frame pixels, the same thing at the map's own size.
+        """
+        return np.floor(points).astype(np.int64)
+
+    def plot_points(self, coordinates, color, name=None):
+        """
+        Draws a batch of trail points onto the trail layer and the current frame.
+        Points on the same pixel as the point before them are skipped, redrawing them would not
+        change the image.
+        """
+        with metrics.stage("project"):
+            points = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+            points = np.column_stack(self.map_projection.transform(points[:, 0], points[:, 1]))
+        points = points[np.isfinite(points).all(axis=1)]
+
+        trail = self.trails.get(name)
+        if trail is None:
+            trail = self.trails[name] = TrailLevels(self.zoom_levels, store=self.redraws_trails)
+        previous = trail.last_dot(self.level)
+        dots = trail.extend(points)[self.level]
+        line = dots if previous is None else np.concatenate(([previous], dots))
+        self.draw_trail(line, dots, color, self.warn_out_of_bounds)
+
+    def draw_trail(self, line, dots, color, warn: bool = False):
+        """
+        Draws a trail line and its dots, in map pixels, onto the trail layer and the current frame.
+        Line segments and dots that are entirely off the frame are skipped. Everything is drawn
+        once, onto the trail layer, and the region it covers is copied to the frame, which
+        matches the trail layer here because the icons have been removed.
+        """
+        line, dots = self.to_screen(line), self.to_screen(dots)
+        margin = 5  # Dot radius
+
+        visible = ((line >= -margin) & (line < (self.width + margin, self.height + margin))).all(axis=1)
+        segments = np.empty(0, dtype=np.int64)
+        if len(line) > 1:
+            # Runs of segments with at least one end on the frame
+            segments = np.flatnonzero(visible[:-1] | visible[1:])
+            for run in np.split(segments, np.flatnonzero(np.diff(segments) > 1) + 1) if len(segments) else ():
+                self.trail_draw.line(line[run[0]:run[-1] + 2].ravel().tolist(), fill=color, width=2)
+
+        on_frame = ((dots >= -margin) & (dots < (self.width + margin, self.height + margin))).all(axis=1)
+        skipped = len(dots) - int(on_frame.sum())
+        if skipped and warn:
+            print(f"Warning: {skipped} point(s) out of bounds.")
+        for x, y in dots[on_frame].tolist():
+            self.trail_draw.ellipse((x - 5, y - 5, x + 5, y + 5), fill=color, outline="black")
+
+        drawn = np.concatenate((line[segments], line[segments + 1], dots[on_frame]))
+        if len(drawn):
+            (left, top), (right, bottom) = drawn.min(axis=0) - margin, drawn.max(axis=0) + margin + 1
+            box = (max(int(left), 0), max(int(top), 0), min(int(right), self.width), min(int(bottom), self.height))
+            if box[0] < box[2] and box[1] < box[3]:
+                self.frame.paste(self.trail.crop(box), box)
+
+    def redraw_trails(self):
+        """
+        Draws every track's stored trail at the current zoom level onto cleared layers.
+        """
+        for name, trail in self.trails.items():
+            self.draw_trail(trail.line(self.level), trail.dots(self.level), TRACK_COLORS.get(name, "red"))
+
+    def render(self, tracks):
+        """
+        Brings the frame up to date with the given tracks and returns it.
+        :param tracks: Dict of track name -> list of (latitude, longitude) tuples or TrackSnapshot.
+                       The last point of each track is drawn as its icon, the rest as trail dots.
+        :return: The RGBA PIL frame, a view of self.frame_buffer. It is reused between calls,
+                 copy it if it must outlive the next render.
+        """
+        # A track that was replaced or shrank invalidates the trail layer, and so does
+        # eviction of more than half of a track since the trail was last drawn in full
+        for name, coordinates in tracks.items():
+            if name not in self.sources:
+                continue
+            source, first = track_origin(coordinates)
+            if (source is not self.sources[name]
+                    or first + len(coordinates) < self.drawn[name]
+                    or 2 * (first - self.firsts[name]) > len(coordinates)):
+                self.reset()
+                break
+
+        # Remove the icons of the previous frame
+        for box in self.icon_boxes:
+            self.frame.paste(self.trail.crop(box), box)
+        self.icon_boxes = []
+
+        # Draw only the points that arrived since the last frame
+        for name, coordinates in tracks.items():
+            source, first = track_origin(coordinates)
+            if name not in self.sources:
+                self.sources[name], self.firsts[name] = source, first
+            # Indexes here are absolute, counting points the track has already evicted
+            start = max(self.drawn.get(name, first), first)
+            end = max(first + len(coordinates) - 1, start)
+            if end > start:
+                self.plot_points(coordinates[start - first:end - first], TRACK_COLORS.get(name, "red"), name)
+            self.drawn[name] = end
+
+        # Paste each track's icon at its latest point
+        for name, coordinates in tracks.items():
+            icon = self.icons.get(name)
+            if icon is None or not coordinates:
+                continue
+            pixel_x, pixel_y = self.projection.pixel(*coordinates[-1])
+            left, top = pixel_x - icon.width // 2, pixel_y - icon.height // 2
+            box = (max(left, 0), max(top, 0), min(left + icon.width, self.width), min(top + icon.height, self.height))
+            if box[0] >= box[2] or box[1] >= box[3]:
+                continue
+            # Composite keeps the frame opaque, clipped icons use the matching part of the source
+            self.frame.alpha_composite(icon, box[:2], (box[0] - left, box[1] - top))
+            self.icon_boxes.append(box)
+
+        return self.frame
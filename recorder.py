@@ -0,0 +1,134 @@
+import os, time, queue, datetime, threading
+from track_format import TrackWriter, TRACK_EXTENSION
+
+# Per-drone session columns: the time and position first so the files replay like any other
+# track, then the mode and the remaining telemetry values of the sample
+SESSION_COLUMNS = (
+    ("time", "d"), ("latitude", "d"), ("longitude", "d"), ("mode", "q"),
+    ("value_2", "d"), ("value_3", "d"), ("value_4", "d"),
+)
+SESSION_PREFIXES = {"rogue": "RogueSession", "discovery": "DiscoverySession"}
+
+class TelemetryRecorder:
+    """
+    Records every telemetry sample the GUI receives to per-drone session track files.
+    submit() only copies the drained records onto a queue. A background thread appends them
+    with buffered, chunked writes, syncs to disk every `sync_interval` seconds and handles
+    rotation, so neither recording nor saving ever waits on the disk on the main thread.
+    """
+
+    def __init__(self, directory: str, chunk_rows: int = 4096, flush_interval: float = 1.0, sync_interval: float = 5.0):
+        """
+        :param directory: Directory the session files are written to.
+        :param chunk_rows: Rows buffered before a chunk is written.
+        :param flush_interval: Longest time a received sample stays buffered in memory.
+        :param sync_interval: Seconds between fsyncs of the open session files.
+        """
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.flush_interval = flush_interval
+        self.sync_interval = sync_interval
+
+        self.queue = queue.Queue()
+        self.writers = {}  # Open session writers by drone, created on the first sample
+        self.samples = 0
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, records):
+        """
+        Queues a batch of telemetry.RECORD records, as passed to client listeners. The batch is
+        copied so the caller stays free to reuse or modify it.
+        """
+        if len(records):
+            self.queue.put(("records", records.copy()))
+
+    def rotate(self, drone: str = None):
+        """
+        Finishes the current session file of one drone (or both) and starts a new one with the next sample.
+        Returns immediately, the file is closed and synced by the recorder thread once every
+        sample submitted before the call has been written.
+        """
+        self.queue.put(("rotate", [drone] if drone else list(SESSION_PREFIXES)))
+
+    def close(self):
+        """
+        Writes everything queued so far, closes the session files and stops the thread.
+        """
+        self.queue.put(("close", None))
+        self.thread.join()
+
+    def active_paths(self):
+        """
+        Session files still being written, so the replay library can leave them out.
+        """
+        return [writer.file_path for writer in list(self.writers.values())]
+
+    def session_path(self, drone: str) -> str:
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.directory, f"{SESSION_PREFIXES[drone]}_{timestamp}{TRACK_EXTENSION}")
+        suffix = 1
+        while os.path.exists(path):
+            suffix += 1
+            path = os.path.join(self.directory, f"{SESSION_PREFIXES[drone]}_{timestamp}_{suffix}{TRACK_EXTENSION}")
+        return path
+
+    def writer(self, drone: str) -> TrackWriter:
+        if drone not in self.writers:
+            self.writers[drone] = TrackWriter(self.session_path(drone), SESSION_COLUMNS, self.chunk_rows)
+        return self.writers[drone]
+
+    # ----- Recorder thread -----
+
+    def run(self):
+        last_flush = last_sync = time.monotonic()
+        while True:
+            try:
+                kind, payload = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                kind, payload = None, None
+
+            try:
+                if kind == "records":
+                    self.record(payload)
+                elif kind == "rotate":
+                    for drone in payload:
+                        if drone in self.writers:
+                            self.finish(self.writers.pop(drone))
+                elif kind == "close":
+                    for writer in self.writers.values():
+                        self.finish(writer)
+                    self.writers.clear()
+                    return
+
+                now = time.monotonic()
+                if now - last_sync >= self.sync_interval:
+                    for writer in self.writers.values():
+                        writer.sync()
+                    last_sync = last_flush = now
+                elif now - last_flush >= self.flush_interval:
+                    for writer in self.writers.values():
+                        writer.flush()
+                    last_flush = now
+            except Exception as e:
+                print(f"Error recording telemetry: {e}")
+
+    def record(self, records):
+        timestamps = records["timestamp"]
+        modes = records["mode"]
+        for drone, values in (("discovery", records["disco"]), ("rogue", records["rogue"])):
+            # A zero latitude means no position was received for that drone
+            seen = values[:, 0] != 0.0
+            if not seen.any():
+                continue
+            values = values[seen]
+            self.writer(drone).write(timestamps[seen], values[:, 0], values[:, 1], modes[seen],
+                                     values[:, 2], values[:, 3], values[:, 4])
+            self.samples += int(seen.sum())
+
+    @staticmethod
+    def finish(writer: TrackWriter):
+        writer.sync()
+        writer.close()
+        print(f"Saved telemetry session: {writer.file_path}")
@@ -0,0 +1,79 @@
+import threading
+from gi.repository import GLib
+
+class RenderScheduler:
+    """
+    Paces map redraws to a widget's frame clock.
+    submit() can be called from any thread and only stores the latest frame data, so at most
+    one frame is ever pending and stale data is replaced instead of queued. A tick callback
+    renders the pending frame no more often than `fps` times a second and is removed again
+    while there is nothing to draw.
+
+    Counters: `coalesced` is pending frames replaced by newer data before being drawn.
+    Rendering itself happens on the RenderWorker, which counts the jobs it skips in `replaced`.
+    """
+
+    def __init__(self, widget, render, fps: float = 30.0):
+        """
+        :param widget: Gtk.Widget whose frame clock drives rendering.
+        :param render: Called on the main thread with the submitted arguments.
+        :param fps: Target frame rate.
+        """
+        self.widget = widget
+        self.render = render
+        self.fps = fps
+        self.lock = threading.Lock()
+        self.pending = None
+        self.scheduled = False  # Tick callback installed or about to be
+        self.tick_id = None
+        self.last_frame_time = None
+
+        self.submitted = 0
+        self.rendered = 0
+        self.coalesced = 0
+
+    def submit(self, *args):
+        """
+        Queues a frame to be rendered with these arguments, replacing any pending frame.
+        """
+        with self.lock:
+            if self.pending is not None:
+                self.coalesced += 1
+            self.pending = args
+            self.submitted += 1
+            if self.scheduled:
+                return
+            self.scheduled = True
+        GLib.idle_add(self.start_ticking)
+
+    def start_ticking(self):
+        if self.tick_id is None:
+            self.tick_id = self.widget.add_tick_callback(self.on_tick)
+        return False  # One-shot idle
+
+    def on_tick(self, widget, frame_clock):
+        now = frame_clock.get_frame_time() / 1e6  # Microseconds -> seconds
+        if self.last_frame_time is not None and now - self.last_frame_time < 1.0 / self.fps:
+            return GLib.SOURCE_CONTINUE
+
+        with self.lock:
+            args, self.pending = self.pending, None
+            if args is None:
+                # Nothing left to draw, stop the frame clock until the next submit()
+                self.scheduled = False
+                self.tick_id = None
+                return GLib.SOURCE_REMOVE
+
+        self.last_frame_time = now
+        try:
+            self.render(*args)
+        finally:
+            self.rendered += 1
+        return GLib.SOURCE_CONTINUE
+
+    def stats(self):
+        return {
+            "submitted": self.submitted,
+            "rendered": self.rendered,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,93 @@
+import threading
+import numpy as np
+from gi.repository import Gdk, GLib
+from instrumentation import metrics
+
+class RenderWorker:
+    """
+    Rasterizes map frames on a background thread.
+    Jobs are callables that draw and return an (H, W, 4) RGBA frame buffer or a PIL image. Only the newest submitted job is
+    kept, so jobs must bring their canvas up to date rather than draw a single step. Finished
+    frames become immutable Gdk.MemoryTexture objects and are double-buffered: one texture
+    is on screen while at most one more waits for the main loop to swap it in, which is the
+    only work left on the main thread.
+    """
+
+    def __init__(self, present):
+        """
+        :param present: Called on the main thread with each finished Gdk.Texture.
+        """
+        self.present = present
+        self.condition = threading.Condition()
+        self.job = None
+        self.sample_time = None  # Sender timestamp of the newest data in the pending job
+        self.swapped = threading.Event()  # Set when no finished frame is waiting for the main loop
+        self.swapped.set()
+        self.frames = 0
+        self.replaced = 0  # Jobs superseded by a newer one before the worker started them
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, job, sample_time: float = None):
+        """
+        Queues a job for the worker, replacing one that has not started yet. Thread-safe.
+        :param sample_time: Sender timestamp of the newest sample the frame shows, for the latency metrics.
+        """
+        with self.condition:
+            if self.job is not None:
+                self.replaced += 1
+            self.job = job
+            self.sample_time = sample_time
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.job is None:
+                    self.condition.wait()
+                job, self.job = self.job, None
+                sample_time = self.sample_time
+
+            try:
+                with metrics.stage("rasterize"):
+                    image = job()
+                if image is None:
+                    continue
+                with metrics.stage("texture"):
+                    texture = self.to_texture(image)
+            except Exception as e:
+                print(f"Error rendering frame: {e}")
+                continue
+
+            # Back buffer is ready, wait until the previous one has been swapped in
+            self.swapped.wait()
+            self.swapped.clear()
+            GLib.idle_add(self.swap, texture, sample_time)
+
+    @staticmethod
+    def to_texture(frame):
+        """
+        Wraps a finished frame in a Gdk.MemoryTexture.
+        A frame costs two memcpys: tobytes() into a bytes object, the only buffer PyGObject passes
+        wholesale (others are marshalled element by element), and g_bytes_new() copying that into
+        GLib.Bytes. new_take() would not save one, PyGObject duplicates transferred arrays first.
+        The texture owns the second copy, so the renderer can keep drawing into its buffer.
+        """
+        if isinstance(frame, np.ndarray):
+            height, width = frame.shape[:2]
+            data = frame.tobytes()
+        else:
+            width, height = frame.size
+            data = frame.convert("RGBA").tobytes() if frame.mode != "RGBA" else frame.tobytes()
+        return Gdk.MemoryTexture.new(width, height, Gdk.MemoryFormat.R8G8B8A8, GLib.Bytes.new(data), width * 4)
+
+    def swap(self, texture, sample_time=None):
+        try:
+            with metrics.stage("present"):
+                self.present(texture)
+            self.frames += 1
+            metrics.frame_presented(sample_time)
+        finally:
+            self.swapped.set()
+        return False  # One-shot idle
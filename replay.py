@@ -0,0 +1,265 @@
+import os, time, heapq
+import numpy as np
+from PIL import Image, ImageDraw
+from coords import read_track, iter_track, last_time
+from map_render import MapProjection, frame_image
+from lod import simplify, distinct_pixels
+
+SPEEDS = (1, 2, 5, 10, 25, 50, 100)
+
+class ReplayClock:
+    """
+    Playback clock shared by the replay engines.
+    The position is a track timestamp advanced by wall-clock time times `speed`. The clock
+    belongs to the main thread, subclasses set `start` and `end`.
+    """
+
+    start = 0.0
+    end = 0.0
+
+    def __init__(self):
+        self.speed = 1
+        self.paused = False
+        self.position = self.start
+        self.wall_time = None
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    @property
+    def finished(self) -> bool:
+        return self.position >= self.end
+
+    def set_speed(self, speed: float):
+        self.tick()
+        self.speed = max(SPEEDS[0], min(speed, SPEEDS[-1]))
+
+    def pause(self):
+        self.tick()
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+        self.wall_time = time.monotonic()
+
+    def seek(self, position: float):
+        self.position = max(self.start, min(position, self.end))
+        self.wall_time = time.monotonic()
+
+    def tick(self) -> float:
+        """
+        Advances the playback position by the wall-clock time since the last tick.
+        """
+        now = time.monotonic()
+        if self.wall_time is not None and not self.paused:
+            self.position = min(self.position + (now - self.wall_time) * self.speed, self.end)
+        self.wall_time = now
+        return self.position
+
+class ReplayEngine(ReplayClock):
+    """
+    Replays a recorded track against its own Time column.
+    The whole file is loaded, projected and simplified once. Each render only draws the path
+    segment added since the previous render, and seeks use a fixed-step time index so they are O(1).
+
+    The clock (play/pause/seek/tick) belongs to the main thread. render() owns the canvas and
+    is meant to run on the render worker, it always catches the canvas up to a given time.
+    """
+
+    def __init__(self, times, latitudes, longitudes, base_map_path, projection: MapProjection = None,
+                 color="red", index_step: float = 0.1):
+        """
+        :param times: Non-decreasing sample times in seconds.
+        :param latitudes: Sample latitudes.
+        :param longitudes: Sample longitudes.
+        :param base_map_path: Map image to draw the replay on, or the map already decoded as an RGBA PIL image.
+        :param projection: Lat/lon -> pixel projection, built from the map size if not given.
+        :param color: Path and point color.
+        :param index_step: Resolution in seconds of the seek index.
+        """
+        self.times = np.asarray(times, dtype=np.float64)
+        self.color = color
+
+        base = base_map_path if isinstance(base_map_path, Image.Image) else Image.open(base_map_path).convert("RGBA")
+        self.base_buffer = np.array(base)
+        self.frame_buffer = self.base_buffer.copy()
+        self.canvas = frame_image(self.frame_buffer)
+        self.draw = ImageDraw.Draw(self.canvas)
+        self.drawn = 0  # Points already on the canvas
+
+        # Project every point once, up front
+        self.projection = projection or MapProjection(base.width, base.height)
+        pixel_x, pixel_y, _ = self.projection.project(latitudes, longitudes)
+        self.pixels = np.column_stack((pixel_x, pixel_y))
+
+        # Level of detail: which points get a dot and which are vertices of the path line
+        self.distinct, self.vertices = simplify(self.pixels)
+
+        # Seek index: number of points at or before each index_step boundary
+        self.index_step = index_step
+        if len(self.times):
+            boundaries = self.times[0] + index_step * np.arange(int((self.times[-1] - self.times[0]) / index_step) + 2)
+            self.time_index = np.searchsorted(self.times, boundaries, side="right")
+        else:
+            self.time_index = np.zeros(1, dtype=np.int64)
+
+        super().__init__()
+
+    @classmethod
+    def load(cls, file_path, base_map_path, projection: MapProjection = None, color="red"):
+        times, latitudes, longitudes = read_track(file_path)
+        return cls(times, latitudes, longitudes, base_map_path, projection, color)
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def start(self) -> float:
+        return float(self.times[0]) if len(self.times) else 0.0
+
+    @property
+    def end(self) -> float:
+        return float(self.times[-1]) if len(self.times) else 0.0
+
+    def index_at(self, position: float) -> int:
+        """
+        Number of points with a time at or before `position`.
+        """
+        if not len(self.times) or position < self.start:
+            return 0
+        slot = min(int((position - self.start) / self.index_step), len(self.time_index) - 1)
+        index = int(self.time_index[slot - 1]) if slot else 0
+        # At most one index_step of points to step over
+        while index < len(self.times) and self.times[index] <= position:
+            index += 1
+        return index
+
+    # ----- Canvas, render worker -----
+
+    def render(self, position: float):
+        """
+        Brings the canvas up to `position` and returns its RGBA frame buffer.
+        Moving forward draws only the new segment, seeking backwards redraws from the base map.
+        """
+        target = self.index_at(position)
+        if target < self.drawn:
+            np.copyto(self.frame_buffer, self.base_buffer)
+            self.drawn = 0
+        if target == self.drawn:
+            return self.frame_buffer
+
+        # Dots for the new points that land on a new pixel
+        for x, y in self.pixels[self.drawn:target][self.distinct[self.drawn:target]].tolist():
+            self.draw.ellipse((x - 5, y - 5, x + 5, y + 5), fill=self.color, outline="black")
+
+        # Simplified path from the previous end point, which is kept so the line stays connected
+        start = max(self.drawn - 1, 0)
+        vertices = self.vertices[start:target].copy()
+        vertices[0] = vertices[-1] = True
+        segment = self.pixels[start:target][vertices]
+        if len(segment) > 1:
+            self.draw.line(segment.ravel().tolist(), fill=self.color, width=2)
+        self.drawn = target
+        return self.frame_buffer
+
+class MultiTrackReplay(ReplayClock):
+    """
+    Replays several timestamped tracks together on one clock, e.g. the rogue and discovery
+    files of one sortie. Files are streamed lazily and merged with a k-way heap merge over
+    their Time columns, so tracks recorded at different sample rates interleave correctly and
+    nothing is loaded into lists up front. Each render draws every track's new points into one
+    combined frame. Seeking forward keeps streaming, seeking backwards restarts the streams.
+    """
+
+    def __init__(self, file_paths, base_map_path, projection: MapProjection = None, colors=None):
+        """
+        :param file_paths: Track files to replay together.
+        :param base_map_path: Map image to draw the replay on.
+        :param projection: Lat/lon -> pixel projection, built from the map size if not given.
+        :param colors: Color per file, by default green for discovery files and red otherwise.
+        """
+        self.file_paths = list(file_paths)
+        self.colors = colors or ["green" if "disco" in os.path.basename(path).lower() else "red" for path in self.file_paths]
+
+        base = Image.open(base_map_path).convert("RGBA")
+        self.base_buffer = np.array(base)
+        self.frame_buffer = self.base_buffer.copy()
+        self.canvas = frame_image(self.frame_buffer)
+        self.draw = ImageDraw.Draw(self.canvas)
+        self.projection = projection or MapProjection(base.width, base.height)
+
+        self.restart()
+
+        # Only the first and last rows of each file are needed for the time span
+        self.start = self.pending[0] if self.pending else 0.0
+        ends = [self.file_end(path) for path in self.file_paths]
+        self.end = max([end for end in ends if end is not None] or [self.start])
+
+        super().__init__()
+
+    @staticmethod
+    def file_end(path, default_interval: float = 0.2):
+        end = last_time(path, default_interval)
+        if end is None:
+            # No Time column, rows are spaced default_interval apart
+            try:
+                with open(path, mode='rb') as file:
+                    end = sum(chunk.count(b"\n") for chunk in iter(lambda: file.read(1 << 20), b"")) * default_interval
+            except OSError:
+                return None
+        return end
+
+    def __len__(self):
+        return len(self.file_paths)
+
+    def restart(self):
+        """
+        Reopens every stream and clears the canvas. Render worker only.
+        """
+        streams = [
+            ((time, track, latitude, longitude) for time, latitude, longitude in iter_track(path))
+            for track, path in enumerate(self.file_paths)
+        ]
+        self.merged = heapq.merge(*streams)
+        self.pending = next(self.merged, None)  # First sample not drawn yet
+        self.last_cells = [None] * len(self.file_paths)  # Pixel of each track's newest sample, for deduplication
+        self.last_dots = [None] * len(self.file_paths)  # Each track's newest dot, where its path continues
+        self.rendered = None
+        np.copyto(self.frame_buffer, self.base_buffer)
+
+    def render(self, position: float):
+        """
+        Brings the combined canvas up to `position` and returns its RGBA frame buffer.
+        """
+        if self.rendered is not None and position < self.rendered:
+            self.restart()
+        self.rendered = position
+
+        # Pull every merged sample up to the position, grouped per track
+        batches = [[] for _ in self.file_paths]
+        while self.pending is not None and self.pending[0] <= position:
+            _, track, latitude, longitude = self.pending
+            batches[track].append((latitude, longitude))
+            self.pending = next(self.merged, None)
+
+        for track, batch in enumerate(batches):
+            if not batch:
+                continue
+            pixel_x, pixel_y, _ = self.projection.project_coordinates(batch)
+            pixels = np.column_stack((pixel_x, pixel_y))
+            mask, self.last_cells[track] = distinct_pixels(pixels, self.last_cells[track])
+            dots = pixels[mask]
+            if not len(dots):
+                continue
+            color = self.colors[track]
+            for x, y in dots.tolist():
+                self.draw.ellipse((x - 5, y - 5, x + 5, y + 5), fill=color, outline="black")
+            # The canvas is permanent and every segment is drawn exactly once, so simplifying the
+            # streamed path could not save any drawing, it only joins the new dots
+            path = dots if self.last_dots[track] is None else np.concatenate(([self.last_dots[track]], dots))
+            if len(path) > 1:
+                self.draw.line(path.ravel().tolist(), fill=color, width=2)
+            self.last_dots[track] = dots[-1]
+
+        return self.frame_buffer
@@ -0,0 +1,201 @@
+import os, json, threading
+import numpy as np
+from PIL import Image, ImageDraw
+from coords import read_track
+from map_render import MapProjection
+
+TRACK_EXTENSIONS = (".csv", ".xlsx", ".trk")
+INDEX_NAME = ".replay_index.json"
+THUMBNAIL_DIR = ".replay_thumbs"
+INDEX_VERSION = 1
+
+def drone_type(file_name: str) -> str:
+    name = file_name.lower()
+    if "rogue" in name:
+        return "rogue"
+    if "disco" in name:
+        return "discovery"
+    return "unknown"
+
+class ReplayLibrary:
+    """
+    Index of the saved sorties in a directory, for the replay picker.
+    Per-file metadata (point count, time span, bounding box, drone type, thumbnail) is cached
+    in a small JSON index next to the files. refresh() only re-reads files whose size or mtime
+    changed, so listing thousands of saved tracks costs one directory scan. Thumbnails are named
+    after the file's mtime and size, so an unchanged file is never drawn twice, even if the
+    index is lost. refresh_async() runs the scan off the GTK main thread.
+    """
+
+    def __init__(self, directory: str, base_map_path: str = None, projection: MapProjection = None):
+        """
+        :param directory: Directory holding the saved track files.
+        :param base_map_path: Map drawn under thumbnails, thumbnails are plain if not given.
+        :param projection: Projection for base_map_path, built from the image size if not given.
+        """
+        self.directory = directory
+        self.index_path = os.path.join(directory, INDEX_NAME)
+        self.thumbnail_dir = os.path.join(directory, THUMBNAIL_DIR)
+        self.base_map_path = base_map_path
+        self.projection = projection
+        self.entries = {}  # Replaced as a whole by refresh(), so readers on other threads see one version or the other
+        self.lock = threading.Lock()  # One refresh at a time
+        self.thumbnail_base = None  # (shrunk base map, scale, projection), loaded on the first thumbnail
+        self.load_index()
+
+    def load_index(self):
+        try:
+            with open(self.index_path, encoding='utf-8') as file:
+                index = json.load(file)
+            if index.get("version") == INDEX_VERSION:
+                self.entries = index.get("files", {})
+        except (OSError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"Ignoring unreadable replay index {self.index_path}: {e}")
+
+    def save_index(self):
+        # Write to a temporary file first so a crash never leaves a truncated index
+        temporary = self.index_path + ".tmp"
+        try:
+            with open(temporary, "w", encoding='utf-8') as file:
+                json.dump({"version": INDEX_VERSION, "files": self.entries}, file)
+            os.replace(temporary, self.index_path)
+        except OSError as e:
+            print(f"Error saving replay index {self.index_path}: {e}")
+
+    def refresh(self, skip=()):
+        """
+        Rescans the directory, re-indexing only new or modified files.
+        :param skip: Paths of files still being written, e.g. the recorder's open sessions. They keep
+                     the entry they already have, if any, instead of being re-read after every chunk.
+        :return: Entries sorted newest first, see describe().
+        """
+        skip = {os.path.abspath(path) for path in skip}
+        with self.lock:
+            entries = dict(self.entries)
+            seen = set()
+            changed = False
+            try:
+                listing = list(os.scandir(self.directory))
+            except OSError as e:
+                print(f"Error scanning replay directory {self.directory}: {e}")
+                listing = []
+
+            for item in listing:
+                if not item.name.lower().endswith(TRACK_EXTENSIONS) or not item.is_file():
+                    continue
+                seen.add(item.name)
+                if os.path.abspath(item.path) in skip:
+                    continue
+                stat = item.stat()
+                cached = entries.get(item.name)
+                if cached and cached["mtime"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+                    continue
+                entries[item.name] = self.describe(item.path, stat)
+                if cached and cached.get("thumbnail") != entries[item.name]["thumbnail"]:
+                    self.remove_thumbnail(cached)
+                changed = True
+
+            for name in set(entries) - seen:
+                self.remove_thumbnail(entries.pop(name))
+                changed = True
+
+            self.entries = entries
+            if changed:
+                self.save_index()
+        return self.list()
+
+    def refresh_async(self, done, skip=()):
+        """
+        Runs refresh() on a background thread.
+        :param done: Called with the refreshed entries on that thread, hand them to the main loop from there.
+        """
+        def run():
+            done(self.refresh(skip))
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def list(self, kind: str = None):
+        """
+        Cached entries, newest first, optionally only one drone type.
+        """
+        entries = [entry for entry in list(self.entries.values()) if kind is None or entry["drone"] == kind]
+        return sorted(entries, key=lambda entry: entry["mtime"], reverse=True)
+
+    def path(self, entry) -> str:
+        return os.path.join(self.directory, entry["name"])
+
+    def describe(self, path: str, stat):
+        """
+        Reads one track file and builds its index entry.
+        """
+        name = os.path.basename(path)
+        times, latitudes, longitudes = read_track(path)
+        entry = {
+            "name": name,
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "drone": drone_type(name),
+            "points": int(len(times)),
+            "start": float(times[0]) if len(times) else None,
+            "end": float(times[-1]) if len(times) else None,
+            "bbox": [float(latitudes.min()), float(longitudes.min()), float(latitudes.max()), float(longitudes.max())] if len(times) else None,
+            "thumbnail": None,
+        }
+        if len(times):
+            thumbnail_path = self.thumbnail_path(name, stat)
+            if os.path.exists(thumbnail_path):
+                entry["thumbnail"] = thumbnail_path  # Drawn before for this exact version of the file
+            else:
+                entry["thumbnail"] = self.render_thumbnail(thumbnail_path, latitudes, longitudes, entry["drone"])
+        return entry
+
+    def thumbnail_path(self, name: str, stat) -> str:
+        # Keyed by the file's mtime and size, a modified file gets a new thumbnail
+        return os.path.join(self.thumbnail_dir, f"{name}.{stat.st_mtime_ns}.{stat.st_size}.png")
+
+    def render_thumbnail(self, thumbnail_path, latitudes, longitudes, drone, width: int = 160):
+        """
+        Draws the track over a shrunk base map and returns the thumbnail path.
+        """
+        try:
+            if self.base_map_path:
+                if self.thumbnail_base is None:
+                    base = Image.open(self.base_map_path).convert("RGB")
+                    scale = width / base.width
+                    self.thumbnail_base = (base.resize((width, max(int(base.height * scale), 1))), scale,
+                                           self.projection or MapProjection(base.width, base.height))
+                shrunk, scale, projection = self.thumbnail_base
+                thumbnail = shrunk.copy()
+                pixel_x, pixel_y, _ = projection.project(latitudes, longitudes)
+            else:
+                # No map, fit the track's own bounding box
+                thumbnail = Image.new("RGB", (width, width), "white")
+                scale = 1.0
+                span = max(np.ptp(latitudes), np.ptp(longitudes), 1e-9)
+                pixel_x = ((longitudes - longitudes.min()) / span * (width - 1)).astype(np.int64)
+                pixel_y = ((latitudes.max() - latitudes) / span * (width - 1)).astype(np.int64)
+
+            points = np.column_stack((pixel_x * scale, pixel_y * scale)).ravel().tolist()
+            color = "green" if drone == "discovery" else "red"
+            draw = ImageDraw.Draw(thumbnail)
+            if len(points) > 2:
+                draw.line(points, fill=color, width=2)
+            else:
+                draw.point(points, fill=color)
+
+            os.makedirs(self.thumbnail_dir, exist_ok=True)
+            thumbnail.save(thumbnail_path)
+            return thumbnail_path
+        except Exception as e:
+            print(f"Error creating thumbnail {thumbnail_path}: {e}")
+            return None
+
+    @staticmethod
+    def remove_thumbnail(entry):
+        if entry.get("thumbnail"):
+            try:
+                os.remove(entry["thumbnail"])
+            except OSError:
+                pass
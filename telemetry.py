@@ -0,0 +1,227 @@
+import threading
+import numpy as np
+from multiprocessing import shared_memory
+
+# One telemetry sample: sender timestamp, mode and the two 5-value position vectors
+RECORD = np.dtype([
+    ("timestamp", "<f8"),
+    ("mode", "<i8"),
+    ("disco", "<f8", (5,)),
+    ("rogue", "<f8", (5,)),
+])
+
+HEADER_BYTES = 64  # [0] sequence (records ever written), [1] capacity, [2] sequence the writer is writing up to
+
+class TelemetryRing:
+    """
+    Fixed-size ring of telemetry records in shared memory.
+    A single writer (the bridge process) appends records and then publishes them by bumping
+    the sequence counter, so no lock is needed. A reader copies every record written since
+    its previous drain out of the shared block, then checks how far the writer had got in the
+    meantime and drops any slot it may have overwritten mid-copy. Records the writer lapped
+    before the reader got to them are counted in `overruns`.
+    """
+
+    def __init__(self, capacity: int = 65536, name: str = None):
+        """
+        :param capacity: Number of records held before the oldest are overwritten.
+        :param name: Attach to an existing ring with this shared memory name instead of creating one.
+        """
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=HEADER_BYTES + capacity * RECORD.itemsize)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+
+        self.header = np.ndarray((3,), dtype="<u8", buffer=self.shm.buf)
+        if self.owner:
+            self.header[:] = (0, capacity, 0)
+        self.capacity = int(self.header[1])
+        self.records = np.ndarray((self.capacity,), dtype=RECORD, buffer=self.shm.buf, offset=HEADER_BYTES)
+
+        self.read_seq = int(self.header[0])  # Reader position, local to this process
+        self.overruns = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def sequence(self) -> int:
+        return int(self.header[0])
+
+    def write(self, timestamp: float, mode: int, disco, rogue):
+        """
+        Appends one record. Only one process may write to a ring.
+        """
+        seq = int(self.header[0])
+        self.header[2] = seq + 1  # Claim the slot before touching it
+        record = self.records[seq % self.capacity]
+        record["timestamp"] = timestamp
+        record["mode"] = mode
+        record["disco"] = disco
+        record["rogue"] = rogue
+        self.header[0] = seq + 1  # Publish after the record is complete
+
+    def extend(self, records):
+        """
+        Appends a batch of RECORD records with at most two slice copies. Only one process may write to a ring.
+        """
+        total = len(records)
+        if not total:
+            return
+        seq = int(self.header[0])
+        records = records[-self.capacity:]  # Older records would be overwritten within the batch anyway
+        count = len(records)
+        self.header[2] = seq + total  # Claim the slots before touching them
+        first = (seq + total - count) % self.capacity
+        split = min(count, self.capacity - first)
+        self.records[first:first + split] = records[:split]
+        self.records[:count - split] = records[split:]
+        self.header[0] = seq + total  # Publish after the records are complete, readers count the skipped ones as overruns
+
+    def drain(self):
+        """
+        Returns the records written since the last drain, oldest first, as a list of zero or one
+        array copied out of shared memory, so it stays valid however far the writer goes on.
+        """
+        head = int(self.header[0])
+        start = max(self.read_seq, head - self.capacity)
+        if head == start:
+            return []
+
+        first, last = start % self.capacity, head % self.capacity
+        if first < last:
+            records = self.records[first:last].copy()
+        else:
+            records = np.concatenate((self.records[first:], self.records[:last]))
+
+        # Slots the writer claimed during the copy may be torn, keep only records it cannot have reached
+        valid = max(start, int(self.header[2]) - self.capacity)
+        self.overruns += valid - self.read_seq
+        self.read_seq = head
+        if valid == head:
+            return []
+        return [records[valid - start:]]
+
+    def close(self):
+        del self.header, self.records
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+class TrackSnapshot:
+    """
+    Read-only view of a TrackStore's points at the moment it was taken.
+    Indexing gives (latitude, longitude) tuples, slicing gives (N, 2) arrays.
+    """
+
+    def __init__(self, rows: np.ndarray, first: int, source):
+        """
+        :param rows: Read-only (N, 3) array of time, latitude, longitude.
+        :param first: Absolute index of rows[0] in the store, counting evicted points.
+        :param source: Identity of the store generation the snapshot came from.
+        """
+        self.rows = rows
+        self.first = first
+        self.source = source
+
+    @property
+    def times(self) -> np.ndarray:
+        return self.rows[:, 0]
+
+    @property
+    def latitudes(self) -> np.ndarray:
+        return self.rows[:, 1]
+
+    @property
+    def longitudes(self) -> np.ndarray:
+        return self.rows[:, 2]
+
+    @property
+    def coordinates(self) -> np.ndarray:
+        return self.rows[:, 1:]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.rows[index, 1:]
+        row = self.rows[index]
+        return (float(row[1]), float(row[2]))
+
+    def __iter__(self):
+        return zip(self.latitudes.tolist(), self.longitudes.tolist())
+
+class TrackStore:
+    """
+    Bounded columnar store for one drone track.
+    Points live in a single float64 array of (time, latitude, longitude) rows that grows
+    geometrically. Retention keeps at most `max_points` points and/or the last `max_age`
+    seconds. Rows are never overwritten in place, so snapshots stay valid without copying.
+    """
+
+    MIN_CAPACITY = 4096
+
+    def __init__(self, max_points: int = None, max_age: float = None):
+        self.max_points = max_points
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.rows = np.empty((self.MIN_CAPACITY, 3))
+            self.start = 0
+            self.end = 0
+            self.evicted = 0  # Points dropped from the front so far
+            self.generation = object()  # New identity so renderers notice the reset
+
+    def __len__(self):
+        return self.end - self.start
+
+    def append(self, time: float, latitude: float, longitude: float):
+        self.extend((time,), (latitude,), (longitude,))
+
+    def extend(self, times, latitudes, longitudes):
+        """
+        Appends a batch of points given as equal-length sequences or arrays.
+        """
+        count = len(times)
+        if not count:
+            return
+        with self.lock:
+            if self.end + count > len(self.rows):
+                self.reallocate(self.end - self.start + count)
+            block = self.rows[self.end:self.end + count]
+            block[:, 0] = times
+            block[:, 1] = latitudes
+            block[:, 2] = longitudes
+            self.end += count
+            self.evict()
+
+    def reallocate(self, needed: int):
+        # A fresh array rather than an in-place move, earlier snapshots keep viewing the old one
+        rows = np.empty((max(2 * needed, self.MIN_CAPACITY), 3))
+        live = self.end - self.start
+        rows[:live] = self.rows[self.start:self.end]
+        self.rows, self.start, self.end = rows, 0, live
+
+    def evict(self):
+        drop = self.start
+        if self.max_points is not None and self.end - self.start > self.max_points:
+            drop = self.end - self.max_points
+        if self.max_age is not None:
+            cutoff = self.rows[self.end - 1, 0] - self.max_age
+            drop = max(drop, self.start + int(np.searchsorted(self.rows[self.start:self.end, 0], cutoff)))
+        self.evicted += drop - self.start
+        self.start = drop
+
+    def snapshot(self) -> TrackSnapshot:
+        with self.lock:
+            rows = self.rows[self.start:self.end]
+            first, source = self.evicted, self.generation
+        rows.flags.writeable = False
+        return TrackSnapshot(rows, first, source)
@@ -0,0 +1,76 @@
+import os, sys, json, socket
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from ac_protocol import FrameReader, MAX_FRAME, HEADER, encode_frame, encode_json, encode_batch, decode_batch, decode_frames
+from telemetry import RECORD
+
+def sample_records(count: int) -> np.ndarray:
+    records = np.zeros(count, dtype=RECORD)
+    records["timestamp"] = np.arange(count) * 0.2
+    records["mode"] = np.arange(count) % 3
+    records["disco"] = np.arange(count * 5).reshape(count, 5)
+    records["rogue"] = -np.arange(count * 5).reshape(count, 5)
+    return records
+
+def test_frames_split_across_reads():
+    payloads = [b"a", b"", b"x" * 100, json.dumps([1, 2]).encode()]
+    stream = b"".join(encode_frame(payload) for payload in payloads)
+    reader = FrameReader(buffer_size=16)
+    frames = []
+    for index in range(0, len(stream), 3):
+        frames += reader.feed(stream[index:index + 3])
+    assert frames == payloads
+    assert reader.start == reader.end == 0
+
+    # Several frames in one read, and a frame larger than the buffer
+    assert reader.feed(stream + encode_frame(b"y" * 1000)) == payloads + [b"y" * 1000]
+
+def test_read_frames_from_a_socket():
+    left, right = socket.socketpair()
+    with left, right:
+        reader = FrameReader(right, buffer_size=8)
+        left.sendall(encode_frame(b"hello") + encode_frame(b"world")[:6])
+        frames = []
+        while len(frames) < 1:
+            frames += reader.read_frames()
+        left.sendall(encode_frame(b"world")[6:])
+        while len(frames) < 2:
+            frames += reader.read_frames()
+        assert frames == [b"hello", b"world"]
+        left.close()
+        with pytest.raises(ConnectionError):
+            reader.read_frames()
+
+def test_bad_frames_raise():
+    with pytest.raises(ValueError):
+        FrameReader().feed(HEADER.pack(MAX_FRAME + 1))
+    with pytest.raises(ConnectionError):
+        FrameReader().feed(b"")
+
+def test_batch_round_trip():
+    records = sample_records(4)
+    decoded = decode_batch(encode_batch(records))
+    assert not decoded.flags.writeable
+    for name in RECORD.names:
+        assert np.array_equal(decoded[name], records[name])
+    assert len(decode_batch(encode_batch(records[:0]))) == 0
+
+def test_bad_batches_raise():
+    payload = encode_batch(sample_records(2))
+    for bad in (payload[:4], payload[:-1], b"TX" + payload[2:], payload[:2] + b"\x09" + payload[3:]):
+        with pytest.raises(ValueError):
+            decode_batch(bad)
+
+def test_mixed_frames_keep_arrival_order():
+    records = sample_records(5)
+    message = [records["disco"][2].tolist(), records["rogue"][2].tolist(), float(records["timestamp"][2]), int(records["mode"][2])]
+    frames = [encode_batch(records[:2]), encode_json(message), encode_batch(records[3:4]), encode_batch(records[4:])]
+    decoded = decode_frames(frames)
+    assert decoded.dtype == RECORD and decoded.flags.writeable
+    for name in RECORD.names:
+        assert np.array_equal(decoded[name], records[name])
+    with pytest.raises(ValueError):
+        decode_frames([b"[1, 2]"])
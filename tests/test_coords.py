@@ -0,0 +1,50 @@
+import os, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from coords import CoordinateTail
+
+HEADER = "Time,Latitude,Longitude\n"
+
+def append(file_path, text: str, mode: str = "a"):
+    with open(file_path, mode, encoding="utf-8") as file:
+        file.write(text)
+
+def test_partial_lines_wait_for_their_end(tmp_path):
+    file_path = str(tmp_path / "RogueCoords.csv")
+    append(file_path, HEADER + "00:00.0,39.1,-104.8\n00:00.2,39.2", "w")
+    tail = CoordinateTail(file_path)
+    assert tail.read() == [(39.1, -104.8)]
+
+    append(file_path, "5,-104.9\nBREAK\n" + HEADER + "00:00.4,39.3,-105.0\n")
+    coordinates = tail.read()
+    assert coordinates == [(39.1, -104.8), (39.25, -104.9), (39.3, -105.0)]
+    assert tail.read() is coordinates  # Nothing new, same list
+
+def test_truncated_or_replaced_files_are_read_again(tmp_path):
+    file_path = str(tmp_path / "RogueCoords.csv")
+    append(file_path, HEADER + "00:00.0,39.1,-104.8\n00:00.2,39.2,-104.9\n", "w")
+    tail = CoordinateTail(file_path)
+    before = tail.read()
+    assert len(before) == 2
+
+    # Truncated in place
+    append(file_path, HEADER + "00:00.0,38.1,-104.8\n", "w")
+    after = tail.read()
+    assert after == [(38.1, -104.8)]
+    assert before == [(39.1, -104.8), (39.2, -104.9)]  # Callers keep the old list
+
+    # Replaced by a longer file
+    replacement = str(tmp_path / "new.csv")
+    append(replacement, HEADER + "00:00.0,37.1,-104.8\n00:00.2,37.2,-104.8\n00:00.4,37.3,-104.8\n", "w")
+    os.replace(replacement, file_path)
+    assert [latitude for latitude, _ in tail.read()] == [37.1, 37.2, 37.3]
+
+def test_missing_file_starts_over(tmp_path):
+    file_path = str(tmp_path / "RogueCoords.csv")
+    tail = CoordinateTail(file_path)
+    assert tail.read() == []
+    append(file_path, "\ufeff" + HEADER + "00:00.0,39.1,-104.8\n", "w")
+    assert tail.read() == [(39.1, -104.8)]
+    os.remove(file_path)
+    assert tail.read() == []
@@ -0,0 +1,34 @@
+import os, sys
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from lod import TrailLOD, TrailLevels, douglas_peucker, zoom_level
+
+def walk(points: int = 5000):
+    return np.cumsum(np.random.default_rng(0).normal(scale=3, size=(points, 2)), axis=0)
+
+def test_trail_only_commits_full_runs():
+    trail = TrailLOD(tolerance=0.5, batch=64)
+    points = walk()
+    pieces = []
+    for start in range(0, len(points), 10):
+        _, piece = trail.extend(points[start:start + 10])
+        assert len(trail.tail) < 64
+        pieces.append(piece)
+    pieces.append(trail.flush())
+    line = np.concatenate([piece[1:] if index else piece for index, piece in enumerate(p for p in pieces if len(p))])
+    assert len(line) == len(trail) < len(points)
+    assert np.array_equal(line[0], points[0]) and np.array_equal(line[-1], points[-1])
+
+def test_douglas_peucker_runs_keep_their_ends():
+    points = walk(1000)
+    keep = douglas_peucker(points, 2.0, step=99)
+    assert set(range(0, 1000, 99)) | {999} <= set(keep.tolist())
+
+def test_levels_get_coarser():
+    levels = TrailLevels(batch=128)
+    levels.extend(walk())
+    sizes = [len(levels.line(level)) for level in range(len(levels.levels))]
+    assert sizes == sorted(sizes)
+    assert zoom_level(0.1) == 0 and zoom_level(1.0) == levels.levels.index(1.0) and zoom_level(100) == len(levels.levels) - 1
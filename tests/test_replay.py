@@ -0,0 +1,56 @@
+import os, sys
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from map_render import MAP_CORNERS
+from replay import MultiTrackReplay
+
+MAP = os.path.join(ROOT, "Test2Map.png")
+RED = (255, 0, 0, 255)
+
+def write_track(file_path, points: int = 2000):
+    """
+    A looping track with far more distinct pixels per render than fit in one line segment.
+    """
+    (north, west), (south, _), (_, east) = MAP_CORNERS
+    steps = np.arange(points)
+    latitudes = (north + south) / 2 + (north - south) * 0.4 * np.sin(steps * 0.01) * np.cos(steps * 0.0037)
+    longitudes = (west + east) / 2 + (east - west) * 0.4 * np.cos(steps * 0.013)
+    with open(file_path, "w", encoding="utf-8") as file:
+        file.write("Time,Latitude,Longitude\n")
+        for step, latitude, longitude in zip(steps.tolist(), latitudes.tolist(), longitudes.tolist()):
+            tenths = step * 2  # 5 Hz
+            file.write(f"{tenths // 600:02d}:{tenths // 10 % 60:02d}.{tenths % 10},{latitude:.8f},{longitude:.7f}\n")
+    return file_path
+
+def red_pixels(replay) -> int:
+    return int(np.all(replay.frame_buffer == RED, axis=-1).sum())
+
+def test_one_shot_render_draws_the_whole_path(tmp_path):
+    track = write_track(str(tmp_path / "RogueCoords.csv"))
+
+    one_shot = MultiTrackReplay([track], MAP)
+    one_shot.render(one_shot.end)
+
+    incremental = MultiTrackReplay([track], MAP)
+    for position in np.linspace(incremental.start, incremental.end, 200).tolist():
+        incremental.render(position)
+
+    # Same dots either way, the paths only differ where they were simplified in different pieces
+    one, many = red_pixels(one_shot), red_pixels(incremental)
+    assert many > 0
+    assert abs(one - many) <= 0.02 * many
+
+def test_end_follows_clocks_that_wrap_past_the_hour(tmp_path):
+    track = str(tmp_path / "RogueCoords.csv")
+    (north, west), (south, _), (_, east) = MAP_CORNERS
+    with open(track, "w", encoding="utf-8") as file:
+        file.write("Time,Latitude,Longitude\n")
+        for step in range(1500):  # 5 s apart, just over two hours on a MM:SS clock
+            seconds = step * 5
+            file.write(f"{seconds // 60 % 60:02d}:{seconds % 60:02d}.0,{(north + south) / 2},{(west + east) / 2}\n")
+
+    replay = MultiTrackReplay([track], MAP)
+    assert replay.start == 0.0
+    assert replay.end == 1499 * 5
@@ -0,0 +1,30 @@
+import os, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from replay_library import ReplayLibrary
+
+def write_track(file_path, points: int):
+    with open(file_path, "w", encoding="utf-8") as file:
+        file.write("Time,Latitude,Longitude\n")
+        for step in range(points):
+            file.write(f"00:{step // 5:02d}.{step % 5 * 2},39.0{step:03d},-104.89\n")
+    return file_path
+
+def test_skipped_files_keep_their_entries(tmp_path):
+    track = write_track(str(tmp_path / "RogueCoords_1.csv"), 20)
+    library = ReplayLibrary(str(tmp_path))
+    entry, = library.refresh()
+    assert entry["points"] == 20 and entry["drone"] == "rogue"
+
+    # Still being written: the cached entry and its thumbnail stay as they were
+    write_track(track, 40)
+    assert library.refresh(skip=[track]) == [entry]
+    assert entry["thumbnail"] is None or os.path.exists(entry["thumbnail"])
+
+    # A file that is only seen while skipped is not indexed yet
+    write_track(str(tmp_path / "RogueCoords_2.csv"), 10)
+    assert [item["name"] for item in library.refresh(skip=[str(tmp_path / "RogueCoords_2.csv")])] == ["RogueCoords_1.csv"]
+
+    assert [item["points"] for item in library.refresh()] in ([10, 40], [40, 10])
+    assert "RogueCoords_1.csv" in ReplayLibrary(str(tmp_path)).entries
@@ -0,0 +1,56 @@
+import os, sys
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from telemetry import TelemetryRing, RECORD
+
+@pytest.fixture
+def ring():
+    ring = TelemetryRing(capacity=8)
+    yield ring
+    ring.close()
+
+def records(first: int, count: int) -> np.ndarray:
+    batch = np.zeros(count, dtype=RECORD)
+    batch["timestamp"] = np.arange(first, first + count)
+    batch["mode"] = 1
+    return batch
+
+def stamps(drained) -> list:
+    return [stamp for part in drained for stamp in part["timestamp"].tolist()]
+
+def test_drains_in_order_once(ring):
+    for stamp in range(3):
+        ring.write(stamp, 1, [stamp] * 5, [0] * 5)
+    assert stamps(ring.drain()) == [0, 1, 2]
+    assert ring.drain() == []
+    ring.extend(records(3, 6))  # Wraps around the end of the ring
+    assert stamps(ring.drain()) == [3, 4, 5, 6, 7, 8]
+    assert ring.overruns == 0
+
+def test_lapped_records_are_counted(ring):
+    ring.extend(records(0, 11))
+    assert stamps(ring.drain()) == list(range(3, 11))
+    assert ring.overruns == 3
+
+def test_slots_claimed_during_a_drain_are_dropped(ring):
+    ring.extend(records(0, 8))
+    # The writer has claimed the next two slots, the oldest two records, but not published them yet
+    ring.header[2] = ring.sequence + 2
+    assert stamps(ring.drain()) == list(range(2, 8))
+    assert ring.overruns == 2
+
+    ring.extend(records(10, 2))  # Publishes the claim
+    assert stamps(ring.drain()) == [10, 11]
+    assert ring.overruns == 2
+
+def test_readers_attach_by_name(ring):
+    reader = TelemetryRing(name=ring.name)
+    try:
+        ring.extend(records(0, 2))
+        assert reader.capacity == ring.capacity
+        assert stamps(reader.drain()) == [0, 1]
+    finally:
+        reader.close()
@@ -0,0 +1,58 @@
+import os, sys
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from track_format import TrackWriter, TrackFile, write_track, read_track_file
+
+def track(points: int):
+    times = np.arange(points) * 0.2
+    return times, 39.0 + times * 1e-5, -104.8 - times * 1e-5
+
+def test_single_chunk_round_trip(tmp_path):
+    times, latitudes, longitudes = track(1000)
+    file_path = write_track(str(tmp_path / "track.trk"), times, latitudes, longitudes)
+    read = read_track_file(file_path)
+    for column, expected in zip(read, (times, latitudes, longitudes)):
+        assert np.array_equal(column, expected)
+        assert isinstance(column, np.memmap)  # Mapped, not copied
+    assert not os.path.exists(file_path + ".tmp")
+
+def test_chunks_and_custom_columns(tmp_path):
+    times, latitudes, longitudes = track(1000)
+    file_path = str(tmp_path / "session.trk")
+    with TrackWriter(file_path, (("time", "d"), ("latitude", "d"), ("longitude", "d"), ("mode", "q")), chunk_rows=300) as writer:
+        for start in range(0, 1000, 70):
+            end = start + 70
+            writer.write(times[start:end], latitudes[start:end], longitudes[start:end], np.arange(start, min(end, 1000)))
+
+    track_file = TrackFile(file_path)
+    assert len(track_file.chunks) == 4 and len(track_file) == 1000
+    assert (track_file.start, track_file.end) == (times[0], times[-1])
+    assert np.array_equal(track_file.column("mode"), np.arange(1000))
+    assert track_file.column("mode").dtype == np.int64
+    assert np.array_equal(track_file.between(59.5, 60.5)["latitude"], latitudes[(times >= 59.5) & (times <= 60.5)])
+
+def test_truncated_file_keeps_complete_chunks(tmp_path):
+    times, latitudes, longitudes = track(100)
+    file_path = str(tmp_path / "cut.trk")
+    with TrackWriter(file_path, chunk_rows=40) as writer:
+        writer.write(times, latitudes, longitudes)
+    size = os.path.getsize(file_path)
+    with open(file_path, "r+b") as file:
+        file.truncate(size - 8)  # A crash in the middle of the last chunk
+
+    track_file = TrackFile(file_path)
+    assert len(track_file) == 80
+    assert np.array_equal(track_file.times, times[:80])
+
+def test_column_names_are_validated(tmp_path):
+    for columns in ((("time", "d"), ("a_name_over_15_bytes", "d")), (("time", "d"), ("time", "d")), (("", "d"),)):
+        with pytest.raises(ValueError):
+            TrackWriter(str(tmp_path / "bad.trk"), columns)
+    assert not os.path.exists(tmp_path / "bad.trk")
+
+    with TrackWriter(str(tmp_path / "ok.trk"), (("time", "d"), ("exactly_15_byte", "d"))) as writer:
+        writer.write([0.0], [1.0])
+    assert list(TrackFile(str(tmp_path / "ok.trk")).columns) == ["time", "exactly_15_byte"]
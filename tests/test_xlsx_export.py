@@ -0,0 +1,29 @@
+import os, sys
+import numpy as np
+import openpyxl
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from coords import read_xlsx
+from xlsx_export import write_xlsx
+
+def test_round_trip_through_openpyxl(tmp_path):
+    times = np.arange(5) * 0.2
+    latitudes = np.array([39.0, np.nan, 39.2, np.inf, 39.4])
+    longitudes = np.array([-104.8, -104.9, -np.inf, -105.1, -105.2])
+    file_name = write_xlsx(str(tmp_path / "track.xlsx"), [("Time", times), ("Latitude", latitudes), ("Longitude", longitudes)],
+                           batch_rows=2)
+
+    rows = list(openpyxl.load_workbook(file_name, read_only=True).active.iter_rows(values_only=True))
+    assert rows[0] == ("Time", "Latitude", "Longitude")
+    assert rows[1] == (0.0, 39.0, -104.8)
+    assert rows[2][1] is None and rows[3][2] is None and rows[4][1] is None
+    assert [row[0] for row in rows[1:]] == times.tolist()
+
+def test_read_xlsx_skips_empty_cells(tmp_path):
+    file_name = write_xlsx(str(tmp_path / "track.xlsx"),
+                           [("Time", [0.0, 0.2, 0.4]), ("Latitude", [39.0, np.nan, 39.2]), ("Longitude", [-104.8, -104.9, -105.0])])
+    times, latitudes, longitudes = read_xlsx(file_name)
+    assert times.tolist() == [0.0, 0.4]
+    assert latitudes.tolist() == [39.0, 39.2]
+    assert longitudes.tolist() == [-104.8, -105.0]
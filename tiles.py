@@ -0,0 +1,304 @@
+import os, json, math
+import numpy as np
+from collections import OrderedDict
+from PIL import Image
+from map_render import MapProjection, MapRenderer, MAP_CORNERS, frame_image
+from lod import ZOOM_LEVELS, zoom_level
+
+TILE_SIZE = 256
+MANIFEST_NAME = "manifest.json"
+MAX_ZOOM = 8.0
+BACKGROUND = (40, 40, 40, 255)  # Shown around the map when zoomed or panned past its edges
+
+class TilePyramid:
+    """
+    A georeferenced map image pre-sliced into a pyramid of PNG tiles on disk.
+    Level 0 is the full-resolution image, every following level halves it until the whole
+    map fits in one tile. Tiles are stored as <tile_dir>/<level>/<column>_<row>.png next to a
+    manifest recording the source file, so the pyramid is only rebuilt when the image changes.
+    """
+
+    def __init__(self, image_path: str, tile_dir: str = None, tile_size: int = TILE_SIZE):
+        """
+        :param image_path: Source map image, any size PIL can open.
+        :param tile_dir: Where the tiles are kept, <image name>_tiles next to the image by default.
+        :param tile_size: Tile edge in pixels.
+        """
+        self.image_path = image_path
+        self.tile_dir = tile_dir or os.path.splitext(image_path)[0] + "_tiles"
+        self.tile_size = tile_size
+
+        manifest = self.load_manifest()
+        if manifest is None:
+            manifest = self.build()
+        self.width, self.height = manifest["width"], manifest["height"]
+        self.levels = manifest["levels"]
+
+    def source_key(self):
+        stat = os.stat(self.image_path)
+        return [os.path.abspath(self.image_path), stat.st_mtime_ns, stat.st_size, self.tile_size]
+
+    def load_manifest(self):
+        try:
+            with open(os.path.join(self.tile_dir, MANIFEST_NAME), encoding='utf-8') as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return manifest if manifest.get("source") == self.source_key() else None
+
+    def build(self):
+        """
+        Slices the source image into tiles for every level and writes the manifest last, so an
+        interrupted build is redone on the next start.
+        """
+        print(f"Building map tiles for {self.image_path} in {self.tile_dir}")
+        image = Image.open(self.image_path).convert("RGBA")
+        width, height = image.size
+
+        level = 0
+        while True:
+            level_dir = os.path.join(self.tile_dir, str(level))
+            os.makedirs(level_dir, exist_ok=True)
+            for row in range(math.ceil(image.height / self.tile_size)):
+                for column in range(math.ceil(image.width / self.tile_size)):
+                    box = (column * self.tile_size, row * self.tile_size,
+                           min((column + 1) * self.tile_size, image.width), min((row + 1) * self.tile_size, image.height))
+                    image.crop(box).save(os.path.join(level_dir, f"{column}_{row}.png"), compress_level=1)
+            if max(image.size) <= self.tile_size:
+                break
+            image = image.reduce(2)
+            level += 1
+
+        manifest = {"source": self.source_key(), "width": width, "height": height, "levels": level + 1}
+        with open(os.path.join(self.tile_dir, MANIFEST_NAME), "w", encoding='utf-8') as file:
+            json.dump(manifest, file)
+        return manifest
+
+    def level_size(self, level: int):
+        scale = 2 ** level
+        return math.ceil(self.width / scale), math.ceil(self.height / scale)
+
+    def level_for(self, zoom: float) -> int:
+        """
+        Coarsest level that still has at least one tile pixel per screen pixel at `zoom`.
+        """
+        if zoom >= 1:
+            return 0
+        return min(int(math.floor(math.log2(1 / zoom))), self.levels - 1)
+
+    def tile_path(self, level: int, column: int, row: int) -> str:
+        return os.path.join(self.tile_dir, str(level), f"{column}_{row}.png")
+
+class TileCache:
+    """
+    LRU cache of decoded tiles, bounded by the memory the decoded pixels take.
+    """
+
+    def __init__(self, pyramid: TilePyramid, max_bytes: int = 64 << 20):
+        self.pyramid = pyramid
+        self.max_bytes = max_bytes
+        self.tiles = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, level: int, column: int, row: int):
+        key = (level, column, row)
+        tile = self.tiles.get(key)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+            self.hits += 1
+            return tile
+
+        self.misses += 1
+        with Image.open(self.pyramid.tile_path(level, column, row)) as image:
+            tile = image.convert("RGBA")
+        self.tiles[key] = tile
+        self.bytes += tile.width * tile.height * 4
+        while self.bytes > self.max_bytes and len(self.tiles) > 1:
+            _, evicted = self.tiles.popitem(last=False)
+            self.bytes -= evicted.width * evicted.height * 4
+        return tile
+
+class TiledMap:
+    """
+    Zoomable, pannable view onto a tile pyramid.
+    The view is one (left, top, zoom, width, height) tuple: the full-resolution map pixel at the
+    top-left screen corner, screen pixels per map pixel, and the viewport size. The main thread
+    replaces the tuple on zoom/pan/resize, renderers read it once per frame, so no lock is needed.
+    """
+
+    def __init__(self, image_path: str, corners=MAP_CORNERS, tile_dir: str = None, cache_bytes: int = 64 << 20):
+        self.pyramid = TilePyramid(image_path, tile_dir)
+        self.cache = TileCache(self.pyramid, cache_bytes)
+        self.projection = MapProjection(self.pyramid.width, self.pyramid.height, corners)
+        self.view = (0.0, 0.0, 1.0, self.pyramid.width, self.pyramid.height)
+
+    # ----- View, main thread -----
+
+    def min_zoom(self, width: int, height: int) -> float:
+        return min(width / self.pyramid.width, height / self.pyramid.height)
+
+    def set_view(self, left: float, top: float, zoom: float, width: int, height: int):
+        zoom = max(self.min_zoom(width, height), min(zoom, MAX_ZOOM))
+        # Keep the map on screen: centered when smaller than the viewport, edge to edge otherwise
+        spans = ((left, width, self.pyramid.width), (top, height, self.pyramid.height))
+        left, top = [
+            (size - screen / zoom) / 2 if size * zoom <= screen else max(0.0, min(start, size - screen / zoom))
+            for start, screen, size in spans
+        ]
+        self.view = (left, top, zoom, width, height)
+
+    def resize(self, width: int, height: int):
+        left, top, zoom, old_width, old_height = self.view
+        if (width, height) == (old_width, old_height) or width <= 0 or height <= 0:
+            return
+        # Keep the same map point in the middle of the view
+        center_x, center_y = left + old_width / zoom / 2, top + old_height / zoom / 2
+        if zoom <= self.min_zoom(old_width, old_height):
+            zoom = self.min_zoom(width, height)  # A fitted map stays fitted
+        self.set_view(center_x - width / zoom / 2, center_y - height / zoom / 2, zoom, width, height)
+
+    def zoom_at(self, factor: float, screen_x: float, screen_y: float):
+        """
+        Zooms by `factor`, keeping the map point under (screen_x, screen_y) in place.
+        """
+        left, top, zoom, width, height = self.view
+        map_x, map_y = left + screen_x / zoom, top + screen_y / zoom
+        zoom = max(self.min_zoom(width, height), min(zoom * factor, MAX_ZOOM))
+        self.set_view(map_x - screen_x / zoom, map_y - screen_y / zoom, zoom, width, height)
+
+    def pan(self, dx: float, dy: float):
+        """
+        Moves the map by (dx, dy) screen pixels.
+        """
+        left, top, zoom, width, height = self.view
+        self.set_view(left - dx / zoom, top - dy / zoom, zoom, width, height)
+
+    def fit(self):
+        _, _, _, width, height = self.view
+        self.set_view(0.0, 0.0, self.min_zoom(width, height), width, height)
+
+    # ----- Rendering, render worker -----
+
+    def compose(self, view, out=None):
+        """
+        Draws the visible tiles of `view` into an RGBA image of the viewport size.
+        Tiles come from the coarsest level with enough detail, so zoomed-out views read a handful
+        of small tiles however large the source image is.
+        """
+        left, top, zoom, width, height = view
+        pyramid = self.pyramid
+        if out is None or out.size != (width, height):
+            out = Image.new("RGBA", (width, height))
+        out.paste(BACKGROUND, (0, 0, width, height))
+
+        level = pyramid.level_for(zoom)
+        scale = 2 ** level
+        factor = zoom * scale  # Screen pixels per level pixel
+        level_width, level_height = pyramid.level_size(level)
+        origin_x, origin_y = left / scale, top / scale
+        tile = pyramid.tile_size
+
+        first_column, first_row = max(int(origin_x // tile), 0), max(int(origin_y // tile), 0)
+        last_column = min(int((origin_x + width / factor) // tile), math.ceil(level_width / tile) - 1)
+        last_row = min(int((origin_y + height / factor) // tile), math.ceil(level_height / tile) - 1)
+
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                image = self.cache.get(level, column, row)
+                # Edges from rounded corners so neighbouring tiles never leave a gap
+                x0 = round((column * tile - origin_x) * factor)
+                y0 = round((row * tile - origin_y) * factor)
+                x1 = round((column * tile + image.width - origin_x) * factor)
+                y1 = round((row * tile + image.height - origin_y) * factor)
+                if (x1 - x0, y1 - y0) != image.size:
+                    image = image.resize((x1 - x0, y1 - y0), Image.BILINEAR)
+                out.paste(image, (x0, y0))
+        return out
+
+class ViewProjection:
+    """
+    Lat/lon -> screen pixel projection for one TiledMap view, used like a MapProjection.
+    """
+
+    def __init__(self, projection: MapProjection, view):
+        self.projection = projection
+        self.left, self.top, self.zoom, self.width, self.height = view
+
+    def project(self, latitudes, longitudes):
+        x, y = self.projection.transform(latitudes, longitudes)
+        x = (x - self.left) * self.zoom
+        y = (y - self.top) * self.zoom
+        in_bounds = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+        np.nan_to_num(x, copy=False, nan=-1.0, posinf=-1.0, neginf=-1.0)
+        np.nan_to_num(y, copy=False, nan=-1.0, posinf=-1.0, neginf=-1.0)
+        return x.astype(np.int64), y.astype(np.int64), in_bounds
+
+    def project_coordinates(self, coordinates):
+        points = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+        return self.project(points[:, 0], points[:, 1])
+
+    def pixel(self, latitude, longitude):
+        x, y = self.projection.transform(latitude, longitude)
+        return int((x - self.left) * self.zoom), int((y - self.top) * self.zoom)
+
+    def to_screen(self, points) -> np.ndarray:
+        """
+        (N, 2) full resolution map pixels -> integer screen pixels.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return np.floor((points - (self.left, self.top)) * self.zoom).astype(np.int64)
+
+class TiledMapRenderer(MapRenderer):
+    """
+    MapRenderer over a TiledMap viewport.
+    Between view changes it works exactly like MapRenderer, drawing only new points. A zoom,
+    pan or resize recomposes the base from the visible tiles and redraws the trails once from
+    their level of detail for the new zoom, with off-screen segments and dots culled, so a redraw
+    never goes back to the samples.
+    """
+
+    warn_out_of_bounds = False  # Points off the current view are expected when zoomed in
+    zoom_levels = ZOOM_LEVELS
+    redraws_trails = True
+
+    def __init__(self, tiled_map: TiledMap, icons):
+        self.tiled_map = tiled_map
+        self.icons = icons
+        self.map_projection = tiled_map.projection
+        self.view = None
+        self.base = None
+        self.frame_buffer = None
+
+    def set_view(self, view):
+        """
+        Recomposes the base map and resizes the frame for a new view.
+        """
+        self.view = view
+        self.projection = ViewProjection(self.tiled_map.projection, view)
+        self.zoom = view[2]
+        self.level = zoom_level(self.zoom, self.zoom_levels)
+        self.width, self.height = view[3], view[4]
+        self.base = self.tiled_map.compose(view, self.base)
+        if self.frame_buffer is None or self.frame_buffer.shape[:2] != (self.height, self.width):
+            self.frame_buffer = np.empty((self.height, self.width, 4), dtype=np.uint8)
+            self.frame = frame_image(self.frame_buffer)
+
+    def to_screen(self, points) -> np.ndarray:
+        return self.projection.to_screen(points)
+
+    def reset(self):
+        self.set_view(self.tiled_map.view if self.view is None else self.view)
+        super().reset()
+
+    def render(self, tracks):
+        view = self.tiled_map.view  # Read once, the main thread may replace it at any time
+        if self.view is None:
+            self.set_view(view)
+            super().reset()
+        elif view != self.view:
+            self.set_view(view)
+            self.clear_layers()
+            self.redraw_trails()
+        return super().render(tracks)
@@ -0,0 +1,67 @@
+"""
+Converts tracks between the CSV/XLSX files and the binary track format.
+
+    python track_convert.py RogueCoords.csv                 # -> RogueCoords.trk
+    python track_convert.py RogueCoords.trk RogueCoords.csv # back to Time,Latitude,Longitude
+"""
+import os, sys, csv, argparse
+import openpyxl
+from coords import read_track
+from track_format import write_track, read_track_file, is_track_file, TRACK_EXTENSION
+
+def format_time(seconds: float) -> str:
+    """
+    Formats seconds the way the telemetry files do, "MM:SS.f" (or "HH:MM:SS.f" past an hour).
+    """
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f"{int(hours)}:{int(minutes):02d}:{seconds:04.1f}"
+    return f"{int(minutes):02d}:{seconds:04.1f}"
+
+def to_track(source: str, destination: str = None) -> str:
+    """
+    Converts a CSV or XLSX track to the binary format.
+    Files without a Time column get times 0.2 s apart, as in replay.
+    :return: Path of the written track file.
+    """
+    destination = destination or os.path.splitext(source)[0] + TRACK_EXTENSION
+    times, latitudes, longitudes = read_track(source)
+    return write_track(destination, times, latitudes, longitudes)
+
+def from_track(source: str, destination: str) -> str:
+    """
+    Converts a binary track back to a "Time,Latitude,Longitude" CSV or XLSX file.
+    """
+    times, latitudes, longitudes = read_track_file(source)
+    rows = zip(map(format_time, times.tolist()), latitudes.tolist(), longitudes.tolist())
+
+    if destination.lower().endswith(".xlsx"):
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet("Coordinates")
+        sheet.append(["Time", "Latitude", "Longitude"])
+        for row in rows:
+            sheet.append(row)
+        workbook.save(destination)
+    else:
+        with open(destination, mode='w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(["Time", "Latitude", "Longitude"])
+            writer.writerows((time, f"{latitude:.8f}", f"{longitude:.8f}") for time, latitude, longitude in rows)
+    return destination
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("source", help="CSV/XLSX file to convert, or a .trk file to export")
+    parser.add_argument("destination", nargs="?", help="Output path, defaults to the source with a .trk extension")
+    args = parser.parse_args(argv)
+
+    if is_track_file(args.source):
+        if not args.destination:
+            parser.error("a .csv or .xlsx destination is required when exporting a track file")
+        print(f"Wrote {from_track(args.source, args.destination)}")
+    else:
+        print(f"Wrote {to_track(args.source, args.destination)}")
+
+if __name__ == "__main__":
+    sys.exit(main())
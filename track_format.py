@@ -0,0 +1,221 @@
+import os, struct
+import numpy as np
+
+# File layout (all little-endian, every section 8-byte aligned):
+#   header   MAGIC, version, column count
+#   columns  one (name, dtype code) entry per column
+#   chunks   CHUNK header (rows, first time, last time), then each column packed as rows * 8 bytes
+# Chunks are self-describing, so a file cut short by a crash still reads up to its last complete chunk.
+MAGIC = b"GTRK"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+COLUMN = struct.Struct("<15sc")  # Names are NUL-padded to 15 bytes
+CHUNK = struct.Struct("<qdd")
+DTYPES = {b"d": np.dtype("<f8"), b"q": np.dtype("<i8")}
+TRACK_COLUMNS = (("time", "d"), ("latitude", "d"), ("longitude", "d"))
+TRACK_EXTENSION = ".trk"
+
+class TrackWriter:
+    """
+    Writes a binary track file chunk by chunk.
+    Rows are buffered until `chunk_rows` are available, then written as one chunk with its time
+    range. Writing a whole track with a single write() call and chunk_rows=None gives one
+    contiguous chunk, which TrackFile can hand out without copying.
+    """
+
+    def __init__(self, file_path: str, columns=TRACK_COLUMNS, chunk_rows: int = 65536):
+        """
+        :param file_path: Output path, replaced if it exists.
+        :param columns: (name, code) pairs, code "d" for float64 or "q" for int64. The first column is the time.
+                        Names are unique and at most 15 bytes of UTF-8.
+        :param chunk_rows: Rows per chunk, None to write each write() call as one chunk.
+        """
+        names = [name.encode() for name, _ in columns]
+        for name in names:
+            if not name or len(name) > COLUMN.size - 1 or b"\0" in name:
+                raise ValueError(f"Column name {name!r} must be 1 to {COLUMN.size - 1} bytes without NUL")
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate column names in {names}")
+        self.file_path = file_path
+        self.columns = [(name, np.dtype(DTYPES[code.encode()])) for name, code in columns]
+        self.chunk_rows = chunk_rows
+        self.pending = []
+        self.pending_rows = 0
+        self.rows = 0
+
+        self.file = open(file_path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, len(self.columns)))
+        for name, code in columns:
+            self.file.write(COLUMN.pack(name.encode(), code.encode()))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, *arrays):
+        """
+        Queues rows, one array per column in column order.
+        """
+        arrays = [np.asarray(array, dtype=dtype).reshape(-1) for array, (_, dtype) in zip(arrays, self.columns)]
+        if len(arrays) != len(self.columns) or len({len(array) for array in arrays}) > 1:
+            raise ValueError(f"Expected {len(self.columns)} columns of equal length")
+        if not len(arrays[0]):
+            return
+        self.pending.append(arrays)
+        self.pending_rows += len(arrays[0])
+
+        if self.chunk_rows is None:
+            self.flush()
+        else:
+            while self.pending_rows >= self.chunk_rows:
+                self.flush(self.chunk_rows)
+
+    def flush(self, rows: int = None):
+        """
+        Writes up to `rows` pending rows (all of them by default) as one chunk.
+        """
+        if not self.pending_rows:
+            return
+        columns = [np.concatenate(parts) for parts in zip(*self.pending)] if len(self.pending) > 1 else self.pending[0]
+        rows = self.pending_rows if rows is None else min(rows, self.pending_rows)
+
+        self.file.write(CHUNK.pack(rows, float(columns[0][0]), float(columns[0][rows - 1])))
+        for column in columns:
+            self.file.write(np.ascontiguousarray(column[:rows]).tobytes())
+        self.rows += rows
+
+        self.pending_rows -= rows
+        self.pending = [[column[rows:] for column in columns]] if self.pending_rows else []
+
+    def sync(self):
+        """
+        Writes every pending row and forces the file to disk.
+        """
+        self.flush()
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+
+def write_track(file_path: str, times, latitudes, longitudes):
+    """
+    Writes a whole (time, latitude, longitude) track as one contiguous chunk.
+    The file is written next to its destination and moved into place, so readers never see half a file.
+    """
+    temporary = file_path + ".tmp"
+    with TrackWriter(temporary, chunk_rows=None) as writer:
+        writer.write(times, latitudes, longitudes)
+    os.replace(temporary, file_path)
+    return file_path
+
+class TrackFile:
+    """
+    Memory-mapped reader for binary track files.
+    Opening a file maps it and walks the chunk headers, no point data is read. Columns of a
+    single-chunk file are read-only views straight into the map, multi-chunk files are joined
+    once on first access. Chunk time ranges let between() skip chunks without touching them.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.columns = {}
+        self.chunks = []  # (first time, last time, {name: view}) per chunk
+
+        size = os.path.getsize(file_path)
+        if size < HEADER.size:
+            raise ValueError(f"{file_path} is not a track file")
+        self.map = np.memmap(file_path, dtype=np.uint8, mode="r")
+
+        magic, version, column_count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{file_path} is not a version {VERSION} track file")
+
+        offset = HEADER.size
+        for _ in range(column_count):
+            name, code = COLUMN.unpack_from(self.map, offset)
+            self.columns[name.rstrip(b"\0").decode()] = DTYPES[code]
+            offset += COLUMN.size
+
+        while offset + CHUNK.size <= size:
+            rows, start, end = CHUNK.unpack_from(self.map, offset)
+            offset += CHUNK.size
+            if rows <= 0 or offset + rows * 8 * len(self.columns) > size:
+                break  # Incomplete chunk at the end of the file
+            views = {}
+            for name, dtype in self.columns.items():
+                views[name] = self.map[offset:offset + rows * dtype.itemsize].view(dtype)
+                offset += rows * dtype.itemsize
+            self.chunks.append((start, end, views))
+
+        self.time_column = next(iter(self.columns), None)
+        self.joined = {}
+
+    def __len__(self):
+        return sum(len(views[self.time_column]) for _, _, views in self.chunks)
+
+    @property
+    def start(self):
+        return self.chunks[0][0] if self.chunks else None
+
+    @property
+    def end(self):
+        return self.chunks[-1][1] if self.chunks else None
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Whole column as one array, a zero-copy view for single-chunk files.
+        """
+        if len(self.chunks) == 1:
+            return self.chunks[0][2][name]
+        if name not in self.joined:
+            parts = [views[name] for _, _, views in self.chunks]
+            self.joined[name] = np.concatenate(parts) if parts else np.empty(0, self.columns[name])
+        return self.joined[name]
+
+    @property
+    def times(self) -> np.ndarray:
+        return self.column("time")
+
+    @property
+    def latitudes(self) -> np.ndarray:
+        return self.column("latitude")
+
+    @property
+    def longitudes(self) -> np.ndarray:
+        return self.column("longitude")
+
+    def between(self, start: float, end: float):
+        """
+        Rows with start <= time <= end, as {name: array}. Only the overlapping chunks are read.
+        """
+        parts = []
+        for first, last, views in self.chunks:
+            if last < start or first > end:
+                continue
+            times = views[self.time_column]
+            low = np.searchsorted(times, start, side="left")
+            high = np.searchsorted(times, end, side="right")
+            parts.append({name: view[low:high] for name, view in views.items()})
+        if len(parts) == 1:
+            return parts[0]
+        return {name: np.concatenate([part[name] for part in parts]) if parts else np.empty(0, dtype)
+                for name, dtype in self.columns.items()}
+
+def is_track_file(file_path: str) -> bool:
+    return file_path.lower().endswith(TRACK_EXTENSION)
+
+def read_track_file(file_path: str):
+    """
+    Maps a binary track. Returns (times, latitudes, longitudes) without copying the point data.
+    """
+    track = TrackFile(file_path)
+    if not track.chunks:
+        empty = np.empty(0, dtype=np.float64)
+        return empty, empty, empty
+    return track.times, track.latitudes, track.longitudes
@@ -0,0 +1,105 @@
+import zipfile, threading
+import numpy as np
+from xml.sax.saxutils import escape
+
+# Minimal package parts of a one-sheet workbook
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{title}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+)
+WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+SHEET_END = '</sheetData></worksheet>'
+
+def write_xlsx(file_name: str, columns, sheet_title: str = "Coordinates", batch_rows: int = 50000, progress=None):
+    """
+    Streams numeric columns straight into an .xlsx file.
+    openpyxl builds a cell object per value even in write-only mode, which takes tens of seconds
+    for a million-point track. Here each batch of rows is formatted into sheet XML in one join and
+    deflated as it is written, so memory stays bounded by `batch_rows`.
+    :param columns: (header, array) pairs, written left to right as numbers. NaN and infinite
+                    values have no XML number form and are left as empty cells.
+    :param progress: Called with (rows written, total rows) after each batch.
+    """
+    headers = [escape(header) for header, _ in columns]
+    arrays = [np.asarray(array, dtype=np.float64).reshape(-1) for _, array in columns]
+    total = min((len(array) for array in arrays), default=0)
+    row = "<row>" + "".join("<c><v>{}</v></c>" for _ in arrays) + "</row>"
+
+    with zipfile.ZipFile(file_name, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as package:
+        package.writestr("[Content_Types].xml", CONTENT_TYPES)
+        package.writestr("_rels/.rels", ROOT_RELS)
+        package.writestr("xl/workbook.xml", WORKBOOK.format(title=escape(sheet_title, {'"': "&quot;"})))
+        package.writestr("xl/_rels/workbook.xml.rels", WORKBOOK_RELS)
+
+        with package.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(SHEET_START.encode())
+            sheet.write(("<row>" + "".join(f'<c t="inlineStr"><is><t>{header}</t></is></c>' for header in headers) + "</row>").encode())
+            for start in range(0, total, batch_rows):
+                batch = [array[start:start + batch_rows] for array in arrays]
+                text = "".join(map(row.format, *(values.tolist() for values in batch)))
+                if not all(np.isfinite(values).all() for values in batch):
+                    for value in ("nan", "inf", "-inf"):
+                        text = text.replace(f"<c><v>{value}</v></c>", "<c/>")
+                sheet.write(text.encode())
+                if progress:
+                    progress(min(start + batch_rows, total), total)
+            sheet.write(SHEET_END.encode())
+    return file_name
+
+class ExcelExport:
+    """
+    Runs write_xlsx() on a background thread.
+    The callbacks are called from that thread, GTK callers wrap them in GLib.idle_add.
+    """
+
+    def __init__(self, file_name: str, columns, progress=None, done=None, sheet_title: str = "Coordinates"):
+        """
+        :param progress: Called with (rows written, total rows) after each batch.
+        :param done: Called with the file name when finished, or None if the export failed.
+        """
+        self.file_name = file_name
+        self.columns = columns
+        self.progress = progress
+        self.done = done
+        self.sheet_title = sheet_title
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def run(self):
+        try:
+            write_xlsx(self.file_name, self.columns, self.sheet_title, progress=self.progress)
+            result = self.file_name
+        except Exception as e:
+            print(f"Error exporting {self.file_name}: {e}")
+            result = None
+        if self.done:
+            self.done(result)